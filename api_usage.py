@@ -0,0 +1,221 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+from atomic_write import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# API limits
+NEWS_API_LIMIT = 100  # NewsAPI free tier: 100 requests per day
+GNEWS_API_LIMIT = 100  # GNews free tier: 100 requests per day
+
+# A provider quota: requests per calendar day, plus an optional rolling window
+# (at most window_limit requests in any window_seconds)
+QuotaPolicy = namedtuple("QuotaPolicy", ["daily_limit", "window_limit", "window_seconds"])
+
+API_QUOTAS = {
+    "newsapi": QuotaPolicy(NEWS_API_LIMIT, None, None),
+    "gnews": QuotaPolicy(GNEWS_API_LIMIT, None, None)
+}
+
+API_USAGE_FILE = "api_usage.json"
+USAGE_LEASE_SIZE = 5  # Quota units claimed from the shared ledger at a time
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive OS lock on path, shared by every process using the same file"""
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ten seconds; keep waiting
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ApiUsageTracker:
+    """Track API usage across sessions, threads and processes
+
+    Usage lives in a JSON ledger shared by every running instance. Quota
+    units are claimed from the ledger in small leases under an OS file lock,
+    so most requests are served from memory, nothing is written on every
+    call, and any number of workers can share one quota without
+    over-spending it. Unused units go back to the ledger on flush() and at
+    exit.
+    """
+
+    def __init__(self, usage_file=API_USAGE_FILE, quotas=None, lease_size=USAGE_LEASE_SIZE):
+        self.usage_file = usage_file
+        self.lock_file = usage_file + ".lock"
+        self.quotas = quotas or API_QUOTAS
+        self.lease_size = lease_size
+        self.lock = threading.RLock()
+        self.leases = {}  # api_name -> (date, units claimed but not used yet)
+        self.usage = {}
+        self.usage_mtime = None
+        self.refresh()
+        atexit.register(self.flush)
+
+    def today(self):
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def load_usage(self):
+        """Load usage data from file"""
+        if os.path.exists(self.usage_file):
+            try:
+                with open(self.usage_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load API usage data: {e}")
+        return {}
+
+    def save_usage(self, usage):
+        """Atomically replace the usage file"""
+        try:
+            atomic_write(self.usage_file, lambda f: json.dump(usage, f))
+        except OSError as e:
+            logger.error(f"Failed to save API usage data: {e}")
+
+    def refresh(self):
+        """Reload the ledger if another process or thread has changed it"""
+        try:
+            mtime = os.stat(self.usage_file).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.usage_mtime or mtime is None:
+            self.usage = self.load_usage()
+            self.usage_mtime = mtime
+
+    @contextmanager
+    def ledger(self):
+        """Read-modify-write the shared ledger under the file lock"""
+        with file_lock(self.lock_file):
+            usage = self.load_usage()
+            before = json.dumps(usage, sort_keys=True)
+            yield usage
+            if json.dumps(usage, sort_keys=True) != before:
+                self.save_usage(usage)
+            self.usage = usage
+            self.usage_mtime = None
+
+    def entry(self, usage, api_name, today):
+        """Get the ledger entry for an API, resetting it on a new day and pruning the rolling window"""
+        entry = usage.setdefault(api_name, {"count": 0, "date": today})
+        if entry.get("date") != today:
+            entry["count"] = 0
+            entry["date"] = today
+
+        policy = self.quotas[api_name]
+        if policy.window_seconds:
+            cutoff = time.time() - policy.window_seconds
+            entry["recent"] = [t for t in entry.get("recent", []) if t > cutoff]
+        return entry
+
+    def available(self, api_name, entry):
+        """Units an API can still spend according to a ledger entry"""
+        policy = self.quotas[api_name]
+        available = policy.daily_limit - entry["count"]
+        if policy.window_limit is not None:
+            available = min(available, policy.window_limit - len(entry.get("recent", [])))
+        return max(0, available)
+
+    def held(self, api_name, today):
+        """Units leased by this tracker that have not been used yet"""
+        date, units = self.leases.get(api_name, (today, 0))
+        return units if date == today else 0
+
+    def try_consume(self, api_name, units=1):
+        """Spend quota for a request, returning False if the quota is exhausted"""
+        return self.consume(api_name, units, force=False)
+
+    def increment_usage(self, api_name):
+        """Record a request that has already been made, even past the quota"""
+        self.consume(api_name, 1, force=True)
+        return self.get_usage(api_name)
+
+    def consume(self, api_name, units, force):
+        with self.lock:
+            today = self.today()
+            held = self.held(api_name, today)
+            if held >= units:
+                self.leases[api_name] = (today, held - units)
+                return True
+
+            # Claim a new lease from the shared ledger
+            with self.ledger() as usage:
+                entry = self.entry(usage, api_name, today)
+                needed = units - held
+                available = self.available(api_name, entry)
+                if available < needed and not force:
+                    return False
+
+                grant = max(needed, min(self.lease_size, available))
+                entry["count"] += grant
+                if self.quotas[api_name].window_seconds:
+                    entry["recent"].extend([time.time()] * grant)
+                self.leases[api_name] = (today, held + grant - units)
+            return True
+
+    def flush(self):
+        """Give unused leased units back to the shared ledger"""
+        with self.lock:
+            today = self.today()
+            unused = {api_name: self.held(api_name, today) for api_name in self.leases}
+            self.leases = {}
+            if not any(unused.values()):
+                return
+
+            with self.ledger() as usage:
+                for api_name, units in unused.items():
+                    if not units:
+                        continue
+                    entry = self.entry(usage, api_name, today)
+                    entry["count"] = max(0, entry["count"] - units)
+                    if "recent" in entry:
+                        del entry["recent"][max(0, len(entry["recent"]) - units):]
+
+    def get_usage(self, api_name):
+        """Get current usage count for the specified API"""
+        with self.lock:
+            self.refresh()
+            today = self.today()
+            entry = self.usage.get(api_name, {})
+            count = entry.get("count", 0) if entry.get("date") == today else 0
+            return max(0, count - self.held(api_name, today))
+
+    def get_remaining(self, api_name):
+        """Get remaining requests for the specified API"""
+        with self.lock:
+            self.refresh()
+            today = self.today()
+            stored = self.usage.get(api_name, {})
+            entry = dict(stored, recent=list(stored.get("recent", [])))
+            entry = self.entry({api_name: entry}, api_name, today)
+            return self.available(api_name, entry) + self.held(api_name, today)
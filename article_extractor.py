@@ -0,0 +1,165 @@
+import codecs
+import time
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# Content containers tried when a page has no <article> element
+CONTENT_DIV_CLASSES = {'content', 'article-content', 'story-content', 'entry-content', 'post-content'}
+
+# Elements whose text is never part of a paragraph
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+# Outcome of a streamed extraction
+ExtractionResult = namedtuple("ExtractionResult", ["paragraphs", "bytes_downloaded", "bytes_used", "truncated"])
+
+
+class _Container:
+    """Paragraphs collected from one content container while it is being parsed"""
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.depth = 1
+        self.paragraphs = []
+        self.closed = False
+
+
+class ArticleExtractor(HTMLParser):
+    """Incrementally collect the lead paragraphs of an article page
+
+    Feed the page in chunks. Paragraphs are taken from the first <article>
+    element, or failing that from the first content <div>, and parsing can
+    stop as soon as done is True. That only happens early for an <article>;
+    a page with just a content div is read to the end, since an <article>
+    anywhere after it would still win.
+    """
+
+    def __init__(self, max_paragraphs=5):
+        super().__init__(convert_charrefs=True)
+        self.max_paragraphs = max_paragraphs
+        self.article = None
+        self.content_div = None
+        self.paragraph = None
+        self.skip_depth = 0
+
+    def _open_containers(self):
+        return [c for c in (self.article, self.content_div) if c is not None and not c.closed]
+
+    @property
+    def done(self):
+        """True once enough paragraphs were collected that more input can't change the result"""
+        if self.article is not None:
+            return self.article.closed or len(self.article.paragraphs) >= self.max_paragraphs
+        # Until the page ends, an <article> may still come and win over the content div
+        return False
+
+    @property
+    def paragraphs(self):
+        """The collected paragraphs, preferring the <article> element"""
+        if self.article is not None:
+            return self.article.paragraphs[:self.max_paragraphs]
+        if self.content_div is not None:
+            return self.content_div.paragraphs[:self.max_paragraphs]
+        return []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+            return
+
+        for container in self._open_containers():
+            if container.tag == tag:
+                container.depth += 1
+
+        if tag == 'article' and self.article is None:
+            self.article = _Container('article')
+        elif tag == 'div' and self.content_div is None:
+            classes = (dict(attrs).get('class') or '').split()
+            if CONTENT_DIV_CLASSES.intersection(classes):
+                self.content_div = _Container('div')
+        elif tag == 'p':
+            # An open paragraph ends where the next one starts
+            self._finish_paragraph()
+            if self._open_containers():
+                self.paragraph = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+
+        if tag == 'p':
+            self._finish_paragraph()
+
+        for container in self._open_containers():
+            if container.tag == tag:
+                container.depth -= 1
+                if container.depth == 0:
+                    self._finish_paragraph()
+                    container.closed = True
+
+    def handle_data(self, data):
+        if self.paragraph is not None and not self.skip_depth:
+            self.paragraph.append(data)
+
+    def _finish_paragraph(self):
+        if self.paragraph is None:
+            return
+        text = "".join(self.paragraph).strip()
+        self.paragraph = None
+        for container in self._open_containers():
+            if len(container.paragraphs) < self.max_paragraphs:
+                container.paragraphs.append(text)
+
+
+def extract_paragraphs(html, max_paragraphs=5, chunk_size=16 * 1024):
+    """Extract the lead paragraphs from a complete article page"""
+    extractor = ArticleExtractor(max_paragraphs)
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+        if extractor.done:
+            return extractor.paragraphs
+    extractor.close()
+    return extractor.paragraphs
+
+
+def stream_paragraphs(response, max_bytes, max_paragraphs=5, chunk_size=16 * 1024, deadline=None,
+                      cancelled=None):
+    """Read a streamed response in chunks and extract its lead paragraphs
+
+    Reading stops as soon as enough paragraphs were collected, once max_bytes
+    have been downloaded, when the monotonic deadline passes or when the
+    optional cancelled() callback returns True, so memory per fetch stays
+    bounded by the chunk size plus the collected text.
+    """
+    encoding = response.encoding
+    if not encoding or encoding.lower() == 'iso-8859-1':
+        # requests falls back to ISO-8859-1 when no charset is given; most pages are UTF-8
+        encoding = 'utf-8'
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    extractor = ArticleExtractor(max_paragraphs)
+    bytes_downloaded = 0
+    truncated = False
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            bytes_downloaded += len(chunk)
+            extractor.feed(decoder.decode(chunk))
+            if extractor.done:
+                break
+            if (bytes_downloaded >= max_bytes or (deadline is not None and time.monotonic() >= deadline)
+                    or (cancelled is not None and cancelled())):
+                truncated = True
+                break
+        else:
+            extractor.feed(decoder.decode(b'', final=True))
+            extractor.close()
+    finally:
+        # Stop the download and give the connection back to the pool
+        response.close()
+
+    paragraphs = extractor.paragraphs
+    bytes_used = sum(len(p.encode('utf-8')) for p in paragraphs)
+    return ExtractionResult(paragraphs, bytes_downloaded, bytes_used, truncated)
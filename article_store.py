@@ -0,0 +1,279 @@
+import atexit
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Default store settings
+ARTICLE_STORE_PATH = os.path.join("cache", "articles.db")
+STORE_BATCH_SIZE = 500  # Articles written per transaction
+STORE_FLUSH_INTERVAL = 0.5  # Seconds the writer waits to fill a batch
+STORE_QUEUE_LIMIT = 10000  # Articles buffered for the writer before new ones are dropped
+STORE_SEARCH_LIMIT = 50  # Results returned by an offline search
+STORE_SEARCH_CANDIDATES = 1000  # Newest matches ranked by relevance for a search
+
+# bm25() weights for the indexed columns: title, snippet, source, enhanced_content
+FTS_COLUMN_WEIGHTS = (10.0, 3.0, 1.0, 2.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url_key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    link TEXT,
+    source TEXT,
+    time TEXT,
+    snippet TEXT,
+    rating INTEGER,
+    image TEXT,
+    political_bias TEXT,
+    enhanced_content TEXT,
+    provider TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, snippet, source, enhanced_content,
+    content='articles', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, snippet, source, enhanced_content)
+    VALUES (new.id, new.title, new.snippet, new.source, new.enhanced_content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, snippet, source, enhanced_content)
+    VALUES ('delete', old.id, old.title, old.snippet, old.source, old.enhanced_content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, snippet, source, enhanced_content)
+    VALUES ('delete', old.id, old.title, old.snippet, old.source, old.enhanced_content);
+    INSERT INTO articles_fts(rowid, title, snippet, source, enhanced_content)
+    VALUES (new.id, new.title, new.snippet, new.source, new.enhanced_content);
+END;
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+# A later sighting refreshes the row but never erases enhanced content or a known bias
+UPSERT = """
+INSERT INTO articles (url_key, title, link, source, time, snippet, rating, image,
+                      political_bias, enhanced_content, provider, seen_at)
+VALUES (:url_key, :title, :link, :source, :time, :snippet, :rating, :image,
+        :political_bias, :enhanced_content, :provider, :seen_at)
+ON CONFLICT(url_key) DO UPDATE SET
+    title = excluded.title,
+    link = excluded.link,
+    source = excluded.source,
+    time = COALESCE(NULLIF(excluded.time, ''), articles.time),
+    snippet = COALESCE(NULLIF(excluded.snippet, ''), articles.snippet),
+    rating = excluded.rating,
+    image = COALESCE(NULLIF(excluded.image, ''), articles.image),
+    political_bias = CASE WHEN excluded.political_bias = 'Not applicable'
+                          THEN articles.political_bias ELSE excluded.political_bias END,
+    enhanced_content = COALESCE(excluded.enhanced_content, articles.enhanced_content),
+    provider = COALESCE(excluded.provider, articles.provider),
+    seen_at = excluded.seen_at
+"""
+
+# Rank only the newest matches so common words stay fast on a large index
+SEARCH = """
+SELECT a.title, a.link, a.source, a.time, a.snippet, a.rating, a.image,
+       a.political_bias, a.enhanced_content, a.provider
+FROM (
+    SELECT rowid, bm25(articles_fts, {weights}) AS score
+    FROM articles_fts
+    WHERE articles_fts MATCH ?
+    ORDER BY rowid DESC
+    LIMIT ?
+) matches
+JOIN articles a ON a.id = matches.rowid
+ORDER BY matches.score
+LIMIT ?
+""".format(weights=", ".join(str(weight) for weight in FTS_COLUMN_WEIGHTS))
+
+
+def fts_query(query):
+    """Turn free text into an FTS5 query matching every word (the last one as a prefix)"""
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+class ArticleStore:
+    """Persistent SQLite FTS5 index of every article the providers have returned
+
+    add() only queues articles; a background writer thread stores them in
+    batched transactions, so ingestion never blocks the caller. search()
+    answers queries from the index without touching any provider or quota.
+    """
+
+    def __init__(self, path=ARTICLE_STORE_PATH, batch_size=STORE_BATCH_SIZE,
+                 flush_interval=STORE_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue(maxsize=STORE_QUEUE_LIMIT)
+        self.local = threading.local()
+        self.enabled = True
+
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = self.connection()
+            connection.executescript(SCHEMA)
+            connection.commit()
+        except (OSError, sqlite3.Error) as e:
+            # Most often an SQLite build without FTS5
+            logger.error(f"Article store disabled: {e}")
+            self.enabled = False
+            return
+
+        self.writer = threading.Thread(target=self.write_batches, name="article-store", daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)
+
+    def connection(self):
+        """SQLite connection for the calling thread"""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def add(self, articles, url_key):
+        """Queue articles for storage; url_key(link) gives the key they are deduplicated on"""
+        if not self.enabled:
+            return
+        now = time.time()
+        for article in articles:
+            key = url_key(article.get('link', ''))
+            if not key or not article.get('title'):
+                continue
+            row = {
+                'url_key': key,
+                'title': article.get('title', ''),
+                'link': article.get('link', ''),
+                'source': article.get('source', ''),
+                'time': article.get('time', ''),
+                'snippet': article.get('snippet', ''),
+                'rating': article.get('rating', 0),
+                'image': article.get('image', ''),
+                'political_bias': article.get('political_bias', 'Not applicable'),
+                'enhanced_content': article.get('enhanced_content'),
+                'provider': article.get('provider'),
+                'seen_at': now
+            }
+            try:
+                self.pending.put_nowait(row)
+            except queue.Full:
+                logger.warning("Article store queue is full, dropping articles")
+                return
+
+    def write_batches(self):
+        """Writer thread: drain the queue in batches, one transaction per batch"""
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.pending.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            try:
+                connection = self.connection()
+                with connection:
+                    connection.executemany(UPSERT, batch)
+                logger.debug(f"Stored {len(batch)} articles")
+            except sqlite3.Error as e:
+                logger.error(f"Failed to store articles: {e}")
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+
+    def flush(self):
+        """Block until every queued article has been written"""
+        if self.enabled:
+            self.pending.join()
+
+    def search(self, query, limit=STORE_SEARCH_LIMIT):
+        """Find stored articles matching every word of the query, best matches first
+
+        Results are tagged with provider "local", so they are never queued
+        back into the store as new sightings.
+        """
+        match = fts_query(query)
+        if not self.enabled or match is None:
+            return []
+        try:
+            rows = self.connection().execute(SEARCH, (match, STORE_SEARCH_CANDIDATES, limit)).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Article store search failed: {e}")
+            return []
+
+        articles = []
+        for row in rows:
+            article = {key: row[key] for key in ('title', 'link', 'source', 'time', 'snippet',
+                                                 'rating', 'image', 'political_bias')}
+            article['time'] = article['time'] or ""
+            article['snippet'] = article['snippet'] or ""
+            article['rating'] = article['rating'] or 0
+            if row['enhanced_content']:
+                article['enhanced_content'] = row['enhanced_content']
+            article['provider'] = "local"
+            articles.append(article)
+        return articles
+
+    def record_query(self, query):
+        """Remember a query that found results, for type-ahead suggestions"""
+        if not self.enabled:
+            return
+        try:
+            with self.connection() as connection:
+                connection.execute("INSERT INTO queries (query, count, last_used) VALUES (?, 1, ?) "
+                                   "ON CONFLICT(query) DO UPDATE SET count = count + 1, last_used = excluded.last_used",
+                                   (query, time.time()))
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record query: {e}")
+
+    def recent_queries(self, limit):
+        """Most recently used queries as (query, count) pairs"""
+        if not self.enabled:
+            return []
+        try:
+            return [tuple(row) for row in self.connection().execute(
+                "SELECT query, count FROM queries ORDER BY last_used DESC LIMIT ?", (limit,))]
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read queries: {e}")
+            return []
+
+    def recent_articles(self, limit):
+        """Title and snippet of the most recently stored articles"""
+        if not self.enabled:
+            return []
+        try:
+            rows = self.connection().execute(
+                "SELECT title, snippet FROM articles ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read articles: {e}")
+            return []
+        return [{'title': row['title'], 'snippet': row['snippet'] or ""} for row in rows]
+
+    def count(self):
+        """Number of stored articles"""
+        if not self.enabled:
+            return 0
+        return self.connection().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
@@ -0,0 +1,22 @@
+import os
+import threading
+
+
+def atomic_write(path, write, encoding="utf-8"):
+    """Replace the file at path with what write(f) writes, so readers never see a partial file
+
+    The content goes to a temporary file unique to this process and thread,
+    which then replaces path. Raises OSError on failure, after removing the
+    temporary file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding=encoding) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,362 @@
+"""Offline micro-benchmarks for the CPU-bound stages of the search pipeline
+
+Every stage runs against the checked-in fixtures in benchmarks/fixtures, so
+no network access or API quota is needed. Results can be written as JSON
+and compared against an earlier run:
+
+    python benchmarks/bench_stages.py --output before.json
+    python benchmarks/bench_stages.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+sys.path.insert(0, REPO_ROOT)
+
+from article_store import ArticleStore  # noqa: E402
+from news_engine import NewsEngine  # noqa: E402
+from query_suggestions import SuggestionIndex  # noqa: E402
+from results_document import build_results  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Input sizes (articles, result items, page multiples or sentences) per stage
+DEFAULT_SIZES = [10, 100, 1000]
+QUICK_SIZES = [10, 100]
+
+# Repetition limits for each stage and size
+MIN_RUNS = 5
+MAX_RUNS = 200
+MIN_TIME = 0.5  # Seconds spent measuring each stage and size
+
+
+def load_fixture(name):
+    """Read a fixture file as text"""
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def scale_list(items, size):
+    """Repeat items until the list has the requested size"""
+    return [items[i % len(items)] for i in range(size)]
+
+
+def scale_results_page(html, item_marker, size):
+    """Repeat the result item lines of a saved results page until it holds size items"""
+    lines = html.splitlines()
+    items = [line for line in lines if item_marker in line]
+    first = lines.index(items[0])
+    last = lines.index(items[-1])
+    return "\n".join(lines[:first] + scale_list(items, size) + lines[last + 1:])
+
+
+def scale_article_page(html, size):
+    """Pad an article page with extra navigation blocks ahead of the article (size = number of blocks)
+
+    The padding goes before <main>, where the extractor still has to parse
+    it; anything after the lead paragraphs is never read.
+    """
+    block = '<div class="promo"><a href="/story/x">Related story</a><p>Summary of a related story.</p></div>'
+    return html.replace("<main>", block * size + "<main>", 1)
+
+
+def scale_text(paragraphs, size):
+    """Build a text of size sentences from the fixture article paragraphs"""
+    sentences = []
+    for i in range(size):
+        # Vary each copy slightly so sentences are not exact duplicates
+        sentences.append(paragraphs[i % len(paragraphs)].rstrip(".") + f" in report {i // len(paragraphs)}.")
+    return " ".join(sentences)
+
+
+def measure(run, prepare=None):
+    """Time run() repeatedly and return the latencies in seconds
+
+    prepare() is called before each timed run (outside the timer) and its
+    result is passed to run(), so stages that mutate their input get a fresh
+    copy every time. Without prepare, run() receives None.
+    """
+    run(prepare() if prepare else None)  # Warm-up
+
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < MAX_RUNS:
+        args = prepare() if prepare else None
+        start = time.perf_counter()
+        run(args)
+        latencies.append(time.perf_counter() - start)
+        if len(latencies) >= MIN_RUNS and time.perf_counter() - started >= MIN_TIME:
+            break
+    return latencies
+
+
+def summarize_latencies(stage, size, latencies):
+    """Reduce raw latencies to a result record"""
+    values = np.array(latencies) * 1000.0
+    mean = float(values.mean())
+    return {
+        "stage": stage,
+        "size": size,
+        "runs": len(latencies),
+        "mean_ms": round(mean, 4),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p90_ms": round(float(np.percentile(values, 90)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "min_ms": round(float(values.min()), 4),
+        "items_per_s": round(size / (mean / 1000.0), 1) if mean else None
+    }
+
+
+def build_stages(engine):
+    """Build the benchmark cases as {stage: function(size) -> (run, prepare)}"""
+    newsapi_data = json.loads(load_fixture("newsapi_response.json"))
+    gnews_data = json.loads(load_fixture("gnews_response.json"))
+    yahoo_html = load_fixture("yahoo_results.html")
+    bing_html = load_fixture("bing_results.html")
+    article_html = load_fixture("article.html")
+
+    base_articles = engine.parse_newsapi_articles(newsapi_data)
+    for article in base_articles:
+        article.pop("is_advertisement", None)
+    paragraphs = [p for p in engine.extract_article_text(article_html)[1].split(". ") if p]
+
+    def fresh_articles(size):
+        return lambda: [dict(article) for article in scale_list(base_articles, size)]
+
+    def bias_case(size):
+        articles = scale_list(base_articles, size)
+        def run(_):
+            for article in articles:
+                engine.determine_political_bias(article["source"], article["snippet"], article["link"])
+        return run, None
+
+    def ads_case(size):
+        def run(articles):
+            for article in articles:
+                engine.is_advertisement(article)
+        return run, fresh_articles(size)
+
+    def scoring_case(size):
+        return (lambda articles: engine.score_articles("climate bill senate", articles)), fresh_articles(size)
+
+    def duplicates_case(size):
+        return (lambda articles: engine.collapse_duplicates(articles)), fresh_articles(size)
+
+    def newsapi_case(size):
+        data = dict(newsapi_data, articles=scale_list(newsapi_data["articles"], size))
+        return (lambda _: engine.parse_newsapi_articles(data)), None
+
+    def gnews_case(size):
+        data = dict(gnews_data, articles=scale_list(gnews_data["articles"], size))
+        return (lambda _: engine.parse_gnews_articles(data)), None
+
+    def yahoo_case(size):
+        html = scale_results_page(yahoo_html, "NewsArticle", size)
+        return (lambda _: engine.parse_yahoo_articles(html)), None
+
+    def bing_case(size):
+        html = scale_results_page(bing_html, "news-card", size)
+        return (lambda _: engine.parse_bing_articles(html)), None
+
+    def article_case(size):
+        html = scale_article_page(article_html, size)
+        def run(_):
+            engine.analyze_article_page({"title": "Fixture", "political_bias": "Not applicable"}, html)
+        return run, None
+
+    def suggest_case(size):
+        index = SuggestionIndex()
+        index.add_articles(dict(article, title=f"{article['title']} {i}")
+                           for i, article in enumerate(scale_list(base_articles, size)))
+        prefixes = [article["title"][:length] for article in base_articles for length in (2, 4, 8)]
+        def run(_):
+            for prefix in prefixes:
+                index.suggest(prefix)
+        return run, None
+
+    def render_case(size):
+        articles = scale_list(base_articles, size)
+        # Materialize every article, not just the first page, to time the worst case
+        return (lambda _: build_results("climate", articles, 3, page_size=size).text), None
+
+    stages = {
+        "determine_political_bias": bias_case,
+        "is_advertisement": ads_case,
+        "score_articles": scoring_case,
+        "collapse_duplicates": duplicates_case,
+        "parse_newsapi": newsapi_case,
+        "parse_gnews": gnews_case,
+        "parse_yahoo": yahoo_case,
+        "parse_bing": bing_case,
+        "extract_article": article_case,
+        "suggest_queries": suggest_case,
+        "build_results_document": render_case
+    }
+
+    summarizer = load_summarizer()
+    if summarizer is not None:
+        def summary_case(size):
+            text = scale_text(paragraphs, size)
+            return (lambda _: summarizer.generate_summary(text)), None
+
+        def keywords_case(size):
+            text = scale_text(paragraphs, size)
+            return (lambda _: summarizer.extract_keywords(text)), None
+
+        def multi_summary_case(size):
+            # size articles, each with a few sentences of enhanced content
+            articles = [dict(article, snippet=paragraphs[i % len(paragraphs)],
+                             enhanced_content=scale_text(paragraphs[i % len(paragraphs):] + paragraphs, 4))
+                        for i, article in enumerate(scale_list(base_articles, size))]
+            return (lambda _: summarizer.summarize_articles(articles, "climate")), None
+
+        stages["generate_summary"] = summary_case
+        stages["extract_keywords"] = keywords_case
+        stages["summarize_articles"] = multi_summary_case
+
+    return stages
+
+
+def ndcg(grades, k):
+    """Normalized discounted cumulative gain of a ranked list of relevance grades"""
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    def dcg(values):
+        values = np.array(values[:k], dtype=float)
+        return float(((2 ** values - 1) * discounts[:len(values)]).sum())
+    ideal = dcg(sorted(grades, reverse=True))
+    return dcg(grades) / ideal if ideal else 0.0
+
+
+def evaluate_ranking(engine, k=5):
+    """NDCG@k of the relevance ranking on the judged fixture queries, against the provider's own order"""
+    judgments = json.loads(load_fixture("relevance_judgments.json"))["queries"]
+    base_articles = engine.parse_newsapi_articles(json.loads(load_fixture("newsapi_response.json")))
+
+    results = []
+    for case in judgments:
+        articles = [dict(article) for article in base_articles]
+        provider_order = [case["judgments"].get(article["title"], 0) for article in articles]
+        engine.score_articles(case["query"], articles)
+        ranked = [case["judgments"].get(article["title"], 0) for article in engine.rank(articles)]
+        results.append({
+            "query": case["query"],
+            f"provider_ndcg@{k}": round(ndcg(provider_order, k), 4),
+            f"ranked_ndcg@{k}": round(ndcg(ranked, k), 4)
+        })
+    return results
+
+
+def load_summarizer():
+    """Create a TextSummarizer, or None if the NLTK data it needs is not installed"""
+    from text_summarizer import TextSummarizer
+
+    try:
+        return TextSummarizer()
+    except LookupError:
+        logger.warning("NLTK data not installed, skipping summarizer stages")
+        return None
+
+
+def git_commit():
+    """Current commit hash, if the benchmark runs inside a git checkout"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the p50 change of every stage and size against an earlier run"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["stage"], r["size"]): r for r in json.load(f)["results"]}
+
+    print(f"\nComparison with {baseline_path} (p50):")
+    for result in results:
+        before = baseline.get((result["stage"], result["size"]))
+        if not before or not before["p50_ms"]:
+            continue
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+        print(f"  {result['stage']:<26} {result['size']:>6}  {before['p50_ms']:>10.3f} -> "
+              f"{result['p50_ms']:>10.3f} ms  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CPU-bound search pipeline stages offline")
+    parser.add_argument("--stage", action="append", help="Only run this stage (may be repeated)")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Input sizes to run for every stage")
+    parser.add_argument("--quick", action="store_true", help="Run only the small input sizes")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previous JSON results file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Data files such as source_bias.json are resolved relative to the repo root,
+    # but the caller's --output and --compare paths relative to where it ran
+    for name in ("output", "compare"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    os.chdir(REPO_ROOT)
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        engine = NewsEngine(response_cache=ResponseCache(cache_dir=os.path.join(cache_dir, "responses")),
+                            article_cache=ResponseCache(cache_dir=os.path.join(cache_dir, "articles")),
+                            article_store=ArticleStore(os.path.join(cache_dir, "articles.db")))
+        stages = build_stages(engine)
+
+        results = []
+        print(f"{'stage':<26} {'size':>6} {'runs':>5} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'items/s':>12}")
+        for stage, build_case in stages.items():
+            if args.stage and stage not in args.stage:
+                continue
+            for size in sizes:
+                run, prepare = build_case(size)
+                result = summarize_latencies(stage, size, measure(run, prepare))
+                results.append(result)
+                print(f"{stage:<26} {size:>6} {result['runs']:>5} {result['p50_ms']:>10.3f} "
+                      f"{result['p90_ms']:>10.3f} {result['p99_ms']:>10.3f} {result['items_per_s'] or 0:>12.1f}")
+
+        quality = evaluate_ranking(engine)
+        print("\nRanking quality on judged fixture queries (NDCG@5):")
+        for case in quality:
+            print(f"  {case['query']:<34} provider order {case['provider_ndcg@5']:.3f}  ranked {case['ranked_ndcg@5']:.3f}")
+        print(f"  {'mean':<34} provider order {np.mean([c['provider_ndcg@5'] for c in quality]):.3f}  "
+              f"ranked {np.mean([c['ranked_ndcg@5'] for c in quality]):.3f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "results": results,
+        "quality": quality
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import contextvars
+import functools
+import threading
+import time
+
+# Token of the search the current code runs for (None outside a cancellable search)
+current_token = contextvars.ContextVar("current_token", default=None)
+
+
+class SearchCancelled(Exception):
+    """Raised at a checkpoint when the search doing the work has been superseded"""
+
+
+class CancelToken:
+    """Thread-safe flag shared by every piece of work started for one search"""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+
+def is_cancelled():
+    """Whether the search the current code runs for has been cancelled"""
+    token = current_token.get()
+    return token is not None and token.cancelled
+
+
+def check_cancelled():
+    """Checkpoint: raise SearchCancelled if the current search has been cancelled"""
+    if is_cancelled():
+        raise SearchCancelled()
+
+
+def sleep(seconds):
+    """Sleep like time.sleep, but wake up and raise SearchCancelled as soon as the search is cancelled"""
+    token = current_token.get()
+    if token is None:
+        time.sleep(seconds)
+    elif token.event.wait(seconds):
+        raise SearchCancelled()
+
+
+def bind_context(fn):
+    """Wrap fn to run in a copy of the caller's context, so executor threads see the caller's token"""
+    return functools.partial(contextvars.copy_context().run, fn)
@@ -0,0 +1,93 @@
+import hashlib
+import re
+import struct
+
+# MinHash settings: one 64-byte BLAKE2b digest yields all 16 hash lanes of a feature
+MINHASH_LANES = 16
+MINHASH_BANDS = 8  # LSH bands of 2 lanes; pairs with ~50% word overlap almost always collide
+MIN_OVERLAP = 0.7  # Share of the smaller word set that must appear in the other to be a duplicate
+MIN_FEATURES = 4  # Smaller word sets only match when identical
+
+_ROWS_PER_BAND = MINHASH_LANES // MINHASH_BANDS
+_LANES_FORMAT = f"<{MINHASH_LANES}I"
+
+
+def features(title, snippet=""):
+    """The set of distinct words (longer than two characters) in a title and snippet"""
+    return frozenset(word for word in re.findall(r"\w+", f"{title} {snippet or ''}".lower()) if len(word) > 2)
+
+
+def minhash(feature_set):
+    """MinHash signature of a feature set, or None if the set is empty"""
+    if not feature_set:
+        return None
+    rows = [struct.unpack(_LANES_FORMAT, hashlib.blake2b(feature.encode("utf-8")).digest())
+            for feature in feature_set]
+    return tuple(min(lane) for lane in zip(*rows))
+
+
+def is_near_duplicate(a, b):
+    """Check two feature sets by exact overlap, so truncated snippets still match their full copy"""
+    smaller = min(len(a), len(b))
+    if smaller < MIN_FEATURES:
+        return a == b
+    return len(a & b) >= MIN_OVERLAP * smaller
+
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def duplicate_groups(feature_sets, exact_keys=None):
+    """Group items whose feature sets are near-duplicates
+
+    Candidate pairs come from bucketing MinHash signatures by band
+    (locality-sensitive hashing) and are confirmed with is_near_duplicate,
+    so grouping takes roughly linear time. exact_keys optionally gives each
+    item a tuple of keys (e.g. its canonical URL and normalized title), and
+    items sharing any non-empty key are grouped as well. Returns lists of
+    indices, each in input order, ordered by their first member.
+    """
+    parents = list(range(len(feature_sets)))
+
+    def union(a, b):
+        root_a, root_b = _find(parents, a), _find(parents, b)
+        if root_a != root_b:
+            parents[max(root_a, root_b)] = min(root_a, root_b)
+
+    buckets = {}
+    identical = {}
+    for i, feature_set in enumerate(feature_sets):
+        if not feature_set:
+            continue
+        # Exact copies join their first occurrence without being bucketed again
+        first = identical.setdefault(feature_set, i)
+        if first != i:
+            union(i, first)
+            continue
+
+        signature = minhash(feature_set)
+        checked = set()
+        for band in range(MINHASH_BANDS):
+            key = (band,) + signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+            for j in buckets.setdefault(key, []):
+                if j not in checked:
+                    checked.add(j)
+                    if is_near_duplicate(feature_set, feature_sets[j]):
+                        union(i, j)
+            buckets[key].append(i)
+
+    if exact_keys:
+        first_seen = {}
+        for i, keys in enumerate(exact_keys):
+            for key in keys:
+                if key:
+                    union(i, first_seen.setdefault(key, i))
+
+    groups = {}
+    for i in range(len(feature_sets)):
+        groups.setdefault(_find(parents, i), []).append(i)
+    return list(groups.values())
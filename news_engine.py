@@ -0,0 +1,1274 @@
+import threading
+import traceback
+import logging
+import json
+from datetime import datetime
+import os
+import re
+import time
+from typing import List, NamedTuple
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.parse import parse_qsl, urlencode, urlparse
+from api_usage import ApiUsageTracker
+from article_store import ArticleStore
+from provider_scheduler import ProviderBusy, ProviderScheduler
+from cancellation import SearchCancelled, bind_context, check_cancelled, current_token
+from response_cache import ResponseCache, normalize_query
+from stage_metrics import metrics
+from query_suggestions import SuggestionIndex
+from term_matcher import TermMatcher, load_lexicons
+from source_bias import SourceBiasIndex
+import near_duplicates
+from article_extractor import extract_paragraphs, stream_paragraphs
+
+# requests and BeautifulSoup are imported where they are first used, so
+# importing the engine (and opening the GUI) stays fast
+
+logger = logging.getLogger(__name__)
+
+# Deep search settings
+PAGE_SIZE = 10  # Results requested per provider page
+DEEP_SEARCH_RESULTS = 50  # Results a deep search aims for
+DEEP_SEARCH_MAX_PAGES = 5  # Pages (and so quota units) a deep search may spend per provider
+DEEP_SEARCH_CONCURRENCY = 3  # Pages fetched at once per provider
+
+# Political bias sources mapping
+LEFT_LEANING_SOURCES = [
+    "cnn", "msnbc", "nbc", "abc", "cbs", "new york times", "nyt", "washington post", 
+    "huffpost", "huffington post", "vox", "slate", "the guardian", "mother jones", 
+    "the atlantic", "politico", "buzzfeed", "daily beast", "time magazine"
+]
+
+RIGHT_LEANING_SOURCES = [
+    "fox news", "breitbart", "the daily caller", "the blaze", "newsmax", "oann", 
+    "new york post", "washington times", "washington examiner", "national review", 
+    "the federalist", "daily wire", "epoch times", "townhall"
+]
+
+CENTRIST_SOURCES = [
+    "reuters", "associated press", "ap", "bloomberg", "the hill", "axios", "c-span", 
+    "bbc", "financial times", "wall street journal", "wsj", "usa today", "christian science monitor"
+]
+
+# Outlet bias data (names, domains and leaning), indexed once at import.
+# The lists above are only used if the data file is missing.
+SOURCE_BIAS_FILE = "source_bias.json"
+SOURCE_BIAS_INDEX = SourceBiasIndex.from_file(SOURCE_BIAS_FILE, [
+    {"names": LEFT_LEANING_SOURCES, "bias": "left"},
+    {"names": RIGHT_LEANING_SOURCES, "bias": "right"},
+    {"names": CENTRIST_SOURCES, "bias": "center"}
+])
+
+# Bias labels for outlet matches, by leaning and match type
+SOURCE_BIAS_LABELS = {
+    ("left", "exact"): "Mostly left leaning",
+    ("right", "exact"): "Mostly right leaning",
+    ("center", "exact"): "Mostly central",
+    ("left", "partial"): "Slightly left leaning",
+    ("right", "partial"): "Slightly right leaning",
+    ("center", "partial"): "Mostly central"
+}
+
+# API keys
+NEWS_API_KEY = "Your_API_key"
+GNEWS_API_KEY = "Your_API_key"
+
+# Article enhancement settings
+ENHANCE_MAX_WORKERS = 6  # Article pages fetched in parallel
+ENHANCE_PER_HOST_LIMIT = 2  # Concurrent fetches allowed against a single publisher
+ENHANCE_FETCH_TIMEOUT = 3  # Seconds allowed for a single article page
+ENHANCE_TIME_BUDGET = 4.0  # Seconds allowed for the whole enhancement batch
+ENHANCE_MAX_BYTES = 512 * 1024  # Bytes downloaded per article page before giving up on it
+ENHANCE_CHUNK_SIZE = 16 * 1024  # Bytes read from the socket per parsing step
+ENHANCE_PARAGRAPHS = 5  # Lead paragraphs extracted from an article page
+
+# Extracted article content cache
+ARTICLE_CACHE_DIR = os.path.join("cache", "articles")
+ARTICLE_CACHE_TTL = 6 * 60 * 60  # Seconds before a cached page is revalidated with the publisher
+ARTICLE_CACHE_MAX_ENTRIES = 2000  # Pages kept on disk before LRU eviction
+ARTICLE_CACHE_MEMORY_ENTRIES = 256  # Pages kept in the in-memory front tier
+ENHANCE_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# "All sources" mode settings
+PROVIDER_DEADLINES = {  # Seconds each provider gets before its results are dropped (and its request times out)
+    "newsapi": 6.0,
+    "gnews": 6.0,
+    "firefox": 8.0
+}
+TRACKING_QUERY_PARAMS = ("utm_", "fbclid", "gclid", "ocid", "cmpid", "smid")
+
+# Define emotional language indicators
+LEFT_LEANING_TERMS = [
+    "progressive", "liberal", "equality", "reform", "social justice", "climate crisis", 
+    "systemic", "marginalized", "diversity", "inclusive", "privilege", "rights", 
+    "undocumented", "gun control", "universal healthcare", "green new deal"
+]
+
+RIGHT_LEANING_TERMS = [
+    "conservative", "traditional", "freedom", "patriot", "taxpayer", "illegal alien", 
+    "border security", "law and order", "family values", "religious liberty", 
+    "second amendment", "pro-life", "socialism", "radical", "woke", "cancel culture"
+]
+
+# Ad detection patterns
+AD_INDICATORS = [
+    "sponsored", "advertisement", "promoted", "buy now", "limited time offer", 
+    "discount", "sale", "% off", "click here", "shop now", "subscribe now",
+    "special offer", "promotion", "deal", "best price", "free shipping"
+]
+
+# Link fragments that suggest a shopping page rather than a news article
+AD_LINK_PATTERN = re.compile(r"product|shop|buy|offer|deal|sale|discount", re.IGNORECASE)
+
+# Term lists can be overridden from a JSON config file
+TERM_LEXICON_FILE = "term_lexicons.json"
+TERM_LEXICONS = load_lexicons(TERM_LEXICON_FILE, {
+    "left_leaning": LEFT_LEANING_TERMS,
+    "right_leaning": RIGHT_LEANING_TERMS,
+    "ad_indicators": AD_INDICATORS
+})
+
+# Compiled once at import and shared by bias and ad detection
+TERM_MATCHER = TermMatcher(TERM_LEXICONS)
+
+# Search providers selectable in the GUI and through NewsEngine.search
+PROVIDERS = ["newsapi", "gnews", "firefox", "local", "all"]
+
+
+class SearchResult(NamedTuple):
+    """Outcome of one run of the search pipeline"""
+    query: str
+    provider: str
+    articles: List[dict]  # Ad-free articles, best first
+    filtered_count: int = 0  # Advertisements removed from the provider results
+    timed_out_providers: List[str] = []  # Providers that missed their deadline ("all" mode)
+
+class NewsEngine:
+    """Search, filtering, ranking, enhancement and summary pipeline without any GUI
+
+    Articles are plain dicts with the keys title, link, source, time,
+    snippet, rating, image and political_bias, plus provider in "all"
+    mode and on local results, published (a timestamp) when the provider
+    gives one, relevance once scored, also_reported_by when near-duplicates
+    were collapsed into it, enhanced_content once enhanced and mock on
+    placeholder results.
+    """
+    
+    def __init__(self, api_tracker=None, response_cache=None, article_cache=None, scheduler=None,
+                 article_store=None, worker_pool=None):
+        # Initialize API usage tracker
+        self.api_tracker = api_tracker or ApiUsageTracker()
+        
+        # Cache provider responses so repeated queries don't spend quota
+        self.response_cache = response_cache or ResponseCache()
+        
+        # Cache extracted article pages by canonical URL so popular stories aren't re-downloaded
+        self.article_cache = article_cache or ResponseCache(cache_dir=ARTICLE_CACHE_DIR,
+                                                            ttl=ARTICLE_CACHE_TTL,
+                                                            max_entries=ARTICLE_CACHE_MAX_ENTRIES,
+                                                            memory_entries=ARTICLE_CACHE_MEMORY_ENTRIES)
+        
+        # Keep every article seen in a local full-text index for offline search
+        self.article_store = article_store or ArticleStore()
+        
+        # Rate limit provider requests and share identical ones already in flight
+        self.scheduler = scheduler or ProviderScheduler()
+        
+        # Worker processes for parsing result pages (None parses in this process)
+        self.worker_pool = worker_pool
+        
+        # Type-ahead suggestions, seeded from the article store in the background on first use
+        self.suggestions = SuggestionIndex()
+        self._suggestions_loader = None
+        self._suggestions_loader_lock = threading.Lock()
+        
+        # Shared connection pool (created on first use) and workers for article enhancement
+        self._http_session = None
+        self._http_session_lock = threading.Lock()
+        self.enhance_executor = ThreadPoolExecutor(max_workers=ENHANCE_MAX_WORKERS,
+                                                   thread_name_prefix="enhance")
+        self.host_semaphores = {}
+        self.host_semaphores_lock = threading.Lock()
+        
+        # Bytes downloaded versus bytes kept by article extraction
+        self.extraction_stats = {"pages": 0, "bytes_downloaded": 0, "bytes_used": 0,
+                                 "cached": 0, "not_modified": 0}
+        self.extraction_stats_lock = threading.Lock()
+        
+        # Workers for querying every provider at once in "all" mode
+        self.provider_executor = ThreadPoolExecutor(max_workers=len(PROVIDER_DEADLINES),
+                                                    thread_name_prefix="provider")
+        
+        # Workers for fetching result pages concurrently in deep searches
+        self.page_executor = ThreadPoolExecutor(max_workers=DEEP_SEARCH_CONCURRENCY * len(PROVIDER_DEADLINES),
+                                                thread_name_prefix="page")
+    
+    def search(self, query, provider="newsapi"):
+        """Run a search through one provider (or "all") and return ranked, ad-free results"""
+        articles, timed_out_providers = self.fetch_articles(query, provider)
+        check_cancelled()
+        articles, filtered_count = self.filter_ads(articles)
+        # Collapse copies first, so only one article per story is scored
+        unique_articles = self.collapse_duplicates(articles)
+        self.score_articles(query, unique_articles)
+        self.store_articles(articles)
+        self.remember_search(query, articles)
+        return SearchResult(query, provider, self.rank(unique_articles), filtered_count, timed_out_providers)
+    
+    def deep_search(self, query, provider="newsapi", max_results=DEEP_SEARCH_RESULTS,
+                    max_pages=DEEP_SEARCH_MAX_PAGES, on_update=None):
+        """Search several result pages per provider concurrently and rank them as they arrive
+        
+        Each provider may spend at most max_pages pages (fewer if its quota
+        is lower). A provider stops early when its pages run out or when a
+        page lands none of its articles in the top max_results. If given,
+        on_update(result) is called from the calling thread with the
+        current top results after every page.
+        """
+        if provider == "local":
+            return self.search(query, provider)
+        if provider != "all" and provider not in PROVIDER_DEADLINES:
+            raise ValueError(f"Unknown provider: {provider}")
+        providers = ["newsapi", "gnews", "firefox"] if provider == "all" else [provider]
+        
+        budgets = {}
+        for name in providers:
+            budget = min(max_pages, -(-max_results // PAGE_SIZE))
+            for quota_api in self.quota_apis(name):
+                budget = min(budget, self.api_tracker.get_remaining(quota_api))
+            budgets[name] = max(1, budget)
+        
+        next_page = {name: 1 for name in providers}
+        pending = {}
+        
+        def submit(name):
+            future = self.page_executor.submit(bind_context(self.call_provider), name, query, next_page[name])
+            pending[future] = (name, next_page[name])
+            next_page[name] += 1
+        
+        for name in providers:
+            for _ in range(min(DEEP_SEARCH_CONCURRENCY, budgets[name])):
+                submit(name)
+        
+        candidates = []
+        ranked = []
+        filtered_count = 0
+        stopped = set()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, page = pending.pop(future)
+                try:
+                    articles = future.result()
+                except SearchCancelled:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error fetching {name} page {page}: {e}")
+                    stopped.add(name)
+                    continue
+                
+                # Placeholders only make sense as the first page
+                if page > 1:
+                    articles = [article for article in articles if not article.get('mock')]
+                page_full = len(articles) >= PAGE_SIZE
+                if provider == "all":
+                    for article in articles:
+                        article['provider'] = name
+                
+                articles, count = self.filter_ads(articles)
+                filtered_count += count
+                candidates.extend(articles)
+                
+                # Re-rank everything so far; scores depend on the whole candidate set
+                unique_articles = self.collapse_duplicates(candidates)
+                self.score_articles(query, unique_articles)
+                ranked = self.rank(unique_articles)
+                top_ids = {id(article) for article in ranked[:max_results]}
+                
+                if not page_full:
+                    stopped.add(name)
+                elif len(ranked) >= max_results and not any(id(article) in top_ids for article in articles):
+                    logger.debug(f"Stopping {name} after page {page}: no new top {max_results} results")
+                    stopped.add(name)
+                
+                if on_update:
+                    on_update(SearchResult(query, provider, ranked[:max_results], filtered_count, []))
+                
+                if name not in stopped and next_page[name] <= budgets[name]:
+                    submit(name)
+        
+        self.store_articles(candidates)
+        self.remember_search(query, candidates)
+        return SearchResult(query, provider, ranked[:max_results], filtered_count, [])
+    
+    def fetch_articles(self, query, provider):
+        """Fetch raw articles from a provider, returning (articles, timed_out_providers)"""
+        if provider == "all":
+            return self.search_all_providers(query)
+        if provider == "local":
+            return self.article_store.search(query), []
+        if provider in PROVIDER_DEADLINES:
+            return self.call_provider(provider, query), []
+        raise ValueError(f"Unknown provider: {provider}")
+    
+    def call_provider(self, provider, query, page=1):
+        """Search one provider page, sharing the upstream request with identical searches already in flight"""
+        search_fn = {
+            "newsapi": self.search_newsapi,
+            "gnews": self.search_gnews,
+            "firefox": self.search_firefox
+        }[provider]
+        
+        key = ResponseCache.make_key(provider, query, page)
+        while True:
+            try:
+                articles = self.scheduler.coalesce(key, lambda: search_fn(query, page))
+                break
+            except ProviderBusy as e:
+                logger.warning(f"Rejected {provider} search: {e}")
+                return self.create_mock_results(query, "Too many searches in progress, please try again shortly.")
+            except SearchCancelled:
+                # The shared request may have belonged to another, abandoned search; retry unless this one is too
+                check_cancelled()
+        
+        # Callers annotate their articles, so each gets its own copies
+        return [dict(article) for article in articles]
+    
+    def filter_ads(self, articles):
+        """Remove advertisements, returning (articles, filtered_count)"""
+        with metrics.span("ad_filter", items=len(articles)):
+            kept = [article for article in articles if not self.is_advertisement(article)]
+        filtered_count = len(articles) - len(kept)
+        
+        if filtered_count > 0:
+            logger.debug(f"Filtered out {filtered_count} advertisements")
+        
+        return kept, filtered_count
+    
+    def score_articles(self, query, articles):
+        """Score articles against the query with BM25 and derive their 1-5 star ratings"""
+        from relevance import RelevanceScorer, stars_from_scores
+        
+        with metrics.span("score", items=len(articles)):
+            scores = RelevanceScorer().score(query, articles)
+            for article, score, stars in zip(articles, scores, stars_from_scores(scores)):
+                article['relevance'] = round(float(score), 4)
+                article['rating'] = int(stars)
+    
+    def rank(self, articles):
+        """Sort articles by relevance score in descending order"""
+        with metrics.span("sort", items=len(articles)):
+            return sorted(articles, key=lambda x: (x.get('relevance', 0), x['rating']), reverse=True)
+    
+    def store_articles(self, articles):
+        """Queue real provider articles for the local store (not mock or already stored ones)"""
+        self.article_store.add([article for article in articles
+                                if not article.get('mock') and article.get('provider') != "local"],
+                               self.canonical_url)
+    
+    def remember_search(self, query, articles):
+        """Feed a search into the type-ahead suggestions; only queries that found real articles are kept"""
+        articles = [article for article in articles if not article.get('mock')]
+        if not articles:
+            return
+        self.suggestions.add_query(query)
+        self.suggestions.add_articles(article for article in articles if article.get('provider') != "local")
+        self.article_store.record_query(normalize_query(query))
+    
+    def suggest(self, prefix):
+        """Suggest queries for a partly typed one from past searches and seen articles, without any provider call"""
+        with self._suggestions_loader_lock:
+            if self._suggestions_loader is None:
+                self._suggestions_loader = threading.Thread(target=self.suggestions.load, args=(self.article_store,),
+                                                            name="suggestions", daemon=True)
+                self._suggestions_loader.start()
+        return self.suggestions.suggest(prefix)
+    
+    def quota_apis(self, provider):
+        """Get the quota-limited APIs used by a provider choice"""
+        if provider == "all":
+            return ["newsapi", "gnews"]
+        if provider in ("firefox", "local"):
+            return []
+        return [provider]
+    
+    @metrics.timed("bias")
+    def determine_political_bias(self, source_name, content=None, link=None):
+        """Determine the political bias of a news source or content"""
+        if not source_name and not content and not link:
+            return "Not applicable"
+            
+        # First check the outlet by name, then by the article's domain
+        bias, match_type = SOURCE_BIAS_INDEX.lookup(source_name, link)
+        if bias:
+            # A domain match identifies the outlet as reliably as its exact name
+            if match_type == "domain":
+                match_type = "exact"
+            return SOURCE_BIAS_LABELS[(bias, match_type)]
+        
+        # If we couldn't determine bias from source, analyze content if available
+        if content:
+            # Count distinct politically charged terms in a single pass
+            matches = TERM_MATCHER.scan(content)
+            left_count = len(matches.terms["left_leaning"])
+            right_count = len(matches.terms["right_leaning"])
+            
+            # Determine bias based on term frequency
+            if left_count > right_count:
+                if left_count >= right_count + 3:
+                    return "Mostly left leaning"
+                else:
+                    return "Slightly left leaning"
+            elif right_count > left_count:
+                if right_count >= left_count + 3:
+                    return "Mostly right leaning"
+                else:
+                    return "Slightly right leaning"
+            elif left_count > 0 or right_count > 0:
+                return "Mostly central"
+                
+        return "Not applicable"
+    
+    def is_advertisement(self, article):
+        """Check if an article is likely an advertisement
+        
+        The verdict is stored on the article so later pipeline stages don't
+        have to scan it again.
+        """
+        if 'is_advertisement' in article:
+            return article['is_advertisement']
+        
+        # Check title, snippet and source for ad indicators
+        text_to_check = (article.get('title', '') + ' ' + article.get('snippet', '') + ' ' + 
+                            article.get('source', ''))
+        is_ad = TERM_MATCHER.contains(text_to_check, "ad_indicators")
+        
+        # Check for suspicious URLs
+        if not is_ad:
+            is_ad = bool(AD_LINK_PATTERN.search(article.get('link', '')))
+        
+        article['is_advertisement'] = is_ad
+        return is_ad
+    
+    @property
+    def http_session(self):
+        """Session whose connection pool is shared by the enhancement workers"""
+        with self._http_session_lock:
+            if self._http_session is None:
+                self._http_session = self.create_http_session()
+            return self._http_session
+    
+    def create_http_session(self):
+        """Create a session whose connection pool is shared by the enhancement workers"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=ENHANCE_MAX_WORKERS * 2,
+                              pool_maxsize=ENHANCE_MAX_WORKERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def get_host_semaphore(self, url):
+        """Get the semaphore limiting concurrent fetches against the URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self.host_semaphores_lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(ENHANCE_PER_HOST_LIMIT)
+            return self.host_semaphores[host]
+    
+    def enhance_top_articles(self, articles, time_budget=ENHANCE_TIME_BUDGET, on_enhanced=None):
+        """Fetch additional content for top articles to enhance the summary
+        
+        Pages are fetched in parallel and the whole batch shares one time budget.
+        Articles whose fetch has not finished when the budget runs out are
+        returned unchanged.
+        
+        If given, on_enhanced(index, article) is called from the calling thread
+        as each fetch completes, with the article's position in the input list
+        and the enhanced article (None if the page revealed an advertisement).
+        """
+        deadline = time.monotonic() + time_budget
+        
+        futures = {}
+        for index, article in enumerate(articles):
+            # Skip if article is an advertisement
+            if self.is_advertisement(article):
+                logger.debug(f"Skipping advertisement: {article.get('title')}")
+                continue
+            future = self.enhance_executor.submit(bind_context(self.enhance_article), article, deadline)
+            futures[future] = index
+        
+        results = {}
+        try:
+            for future in as_completed(futures, timeout=max(0, deadline - time.monotonic())):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except SearchCancelled:
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                except Exception as e:
+                    # If enhancement fails, just use the original article
+                    logger.error(f"Error enhancing article: {e}")
+                    results[index] = articles[index]
+                
+                if on_enhanced:
+                    on_enhanced(index, results[index])
+        except FutureTimeoutError:
+            logger.debug(f"Enhancement budget exhausted with {len(futures) - len(results)} pages pending")
+            for future in futures:
+                future.cancel()
+        
+        enhanced_articles = []
+        for index in sorted(futures.values()):
+            # Out of time keeps the original article, None means the page revealed an ad
+            enhanced_article = results.get(index, articles[index])
+            if enhanced_article is not None:
+                enhanced_articles.append(enhanced_article)
+        
+        self.store_articles([article for article in enhanced_articles if article.get('enhanced_content')])
+                
+        return enhanced_articles
+    
+    def enhance_article(self, article, deadline):
+        """Fetch and analyze a single article page, returning None if it is an ad"""
+        check_cancelled()
+        
+        # Create a copy of the article to avoid modifying the original
+        enhanced_article = article.copy()
+        
+        # Only try to enhance if we have a valid URL
+        link = enhanced_article.get('link')
+        if not link or not link.startswith('http'):
+            return enhanced_article
+        
+        # A fresh cache entry needs no request at all
+        cache_key = self.canonical_url(link)
+        page = self.article_cache.get(cache_key)
+        if page is not None:
+            self.count_extraction("cached")
+            return self.apply_page_analysis(enhanced_article, page)
+        
+        # Wait for a free slot on this host, but never past the batch deadline
+        host_semaphore = self.get_host_semaphore(link)
+        if not host_semaphore.acquire(timeout=max(0, deadline - time.monotonic())):
+            return enhanced_article
+        
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return enhanced_article
+            with metrics.span("enhance"):
+                page = self.fetch_article_page(link, self.article_cache.get_stale(cache_key),
+                                               min(ENHANCE_FETCH_TIMEOUT, remaining), deadline)
+        finally:
+            host_semaphore.release()
+        
+        if page is None:
+            return enhanced_article
+        return self.apply_page_analysis(enhanced_article, page)
+    
+    def fetch_article_page(self, link, stale_page, timeout, deadline):
+        """Download and analyze an article page, revalidating a stale cached copy if there is one
+        
+        Returns the page analysis (see analyze_paragraphs) or None if the page
+        could not be fetched.
+        """
+        headers = {"User-Agent": ENHANCE_USER_AGENT}
+        if stale_page:
+            if stale_page.get('etag'):
+                headers["If-None-Match"] = stale_page['etag']
+            if stale_page.get('last_modified'):
+                headers["If-Modified-Since"] = stale_page['last_modified']
+        
+        # Stream the page and stop reading once the lead paragraphs are in
+        response = self.http_session.get(link, headers=headers, stream=True, timeout=timeout)
+        cache_key = self.canonical_url(link)
+        
+        if response.status_code == 304 and stale_page:
+            response.close()
+            page = dict(stale_page, etag=response.headers.get('ETag') or stale_page.get('etag'))
+            self.article_cache.put(cache_key, page)
+            self.count_extraction("not_modified")
+            return page
+        
+        if response.status_code != 200:
+            response.close()
+            return None
+        
+        token = current_token.get()
+        extraction = stream_paragraphs(response, ENHANCE_MAX_BYTES, ENHANCE_PARAGRAPHS,
+                                       chunk_size=ENHANCE_CHUNK_SIZE, deadline=deadline,
+                                       cancelled=token and (lambda: token.cancelled))
+        self.record_extraction(extraction)
+        check_cancelled()
+        logger.debug(f"Extracted {extraction.bytes_used} of {extraction.bytes_downloaded} bytes "
+                     f"downloaded from {link}{' (truncated)' if extraction.truncated else ''}")
+        
+        page = self.analyze_paragraphs(extraction.paragraphs)
+        page['etag'] = response.headers.get('ETag')
+        page['last_modified'] = response.headers.get('Last-Modified')
+        
+        # A read cut short by the deadline may be missing paragraphs, so don't keep it
+        if not extraction.truncated or extraction.bytes_downloaded >= ENHANCE_MAX_BYTES:
+            self.article_cache.put(cache_key, page)
+        return page
+    
+    def record_extraction(self, extraction):
+        """Add a streamed extraction to the bytes downloaded / bytes used totals"""
+        with self.extraction_stats_lock:
+            self.extraction_stats["pages"] += 1
+            self.extraction_stats["bytes_downloaded"] += extraction.bytes_downloaded
+            self.extraction_stats["bytes_used"] += extraction.bytes_used
+    
+    def count_extraction(self, outcome):
+        """Count an article served from the cache ("cached") or revalidated by a 304 ("not_modified")"""
+        with self.extraction_stats_lock:
+            self.extraction_stats[outcome] += 1
+    
+    def extraction_stats_text(self):
+        """Short downloaded/used summary for the status bar"""
+        with self.extraction_stats_lock:
+            stats = dict(self.extraction_stats)
+        parts = []
+        if stats["pages"]:
+            parts.append(f"Pages: {stats['bytes_downloaded'] // 1024} KB read, "
+                         f"{stats['bytes_used'] // 1024} KB used")
+        if stats["cached"] or stats["not_modified"]:
+            parts.append(f"{stats['cached']} cached, {stats['not_modified']} unchanged")
+        return ", ".join(parts)
+    
+    def join_paragraphs(self, paragraphs):
+        """Join lead paragraphs into (visible_content, full_content)"""
+        content = ""
+        full_content = ""
+        for text in paragraphs:
+            full_content += text + " "
+            if len(content) < 200:  # Only add to visible content if under limit
+                content += text + " "
+        return content, full_content
+    
+    def extract_article_text(self, html):
+        """Extract the lead paragraphs of an article page
+        
+        Returns (visible_content, full_content), both empty if no content
+        container was found.
+        """
+        return self.join_paragraphs(extract_paragraphs(html, ENHANCE_PARAGRAPHS))
+    
+    def analyze_article_page(self, enhanced_article, html):
+        """Add page content and content-based bias to an article, returning None if it is an ad"""
+        page = self.analyze_paragraphs(extract_paragraphs(html, ENHANCE_PARAGRAPHS))
+        return self.apply_page_analysis(enhanced_article, page)
+    
+    def analyze_paragraphs(self, paragraphs):
+        """Analyze extracted paragraphs once so the result can be cached per URL
+        
+        Returns a dict with the paragraphs, the ad verdict and the bias
+        found by content analysis ("Not applicable" if none).
+        """
+        content, full_content = self.join_paragraphs(paragraphs)
+        
+        # Check if the full content suggests this is an ad
+        is_advertisement = TERM_MATCHER.contains(full_content, "ad_indicators")
+        content_bias = "Not applicable"
+        if not is_advertisement and full_content:
+            content_bias = self.determine_political_bias(None, full_content)
+        
+        return {
+            'paragraphs': paragraphs,
+            'is_advertisement': is_advertisement,
+            'content_bias': content_bias
+        }
+    
+    def apply_page_analysis(self, enhanced_article, page):
+        """Add analyzed page content to an article, returning None if the page is an ad"""
+        if page['is_advertisement']:
+            logger.debug(f"Skipping advertisement detected from content: {enhanced_article.get('title')}")
+            return None
+        
+        content, _ = self.join_paragraphs(page['paragraphs'])
+        
+        # Truncate visible content to a reasonable length
+        if content:
+            content = content[:200] + "..." if len(content) > 200 else content
+            enhanced_article['enhanced_content'] = content
+            
+            # If political bias is "Not applicable", use the one found from content
+            if enhanced_article.get('political_bias') == "Not applicable" and page['content_bias'] != "Not applicable":
+                enhanced_article['political_bias'] = page['content_bias'] + " (content analysis)"
+        
+        return enhanced_article
+    
+    @metrics.timed("summary")
+    def generate_summary(self, query, articles):
+        """Generate a brief summary of the news results as a bulleted list"""
+        if not articles:
+            return "No relevant information found."
+        
+        # Create a simple bulleted list summary
+        summary = f"Top stories about '{query}':\n\n"
+        
+        # Try to fetch additional content for top articles
+        enhanced_articles = self.enhance_top_articles(articles[:3])
+        
+        # Extract key information from each article
+        for i, article in enumerate(enhanced_articles):  # Limit to top 5 articles
+            # Get the source and date
+            source_info = f"{article['source']}"
+            if article['time']:
+                source_info += f" ({article['time']})"
+                
+            # Get the title or a snippet
+            headline = article['title']
+            
+            # Add relevance stars
+            stars = "★" * article['rating'] + "☆" * (5 - article['rating'])
+            
+            # Get political bias
+            political_bias = article.get('political_bias', 'Not applicable')
+            
+            # Add to summary with bullet point, relevance rating and political bias
+            summary += f"• {headline}\n  {source_info} • Relevance: {stars} • Bias: {political_bias}\n"
+            
+            # Add enhanced content if available
+            if article.get('enhanced_content'):
+                summary += f"  Key points: {article['enhanced_content']}\n"
+            
+            summary += "\n"
+            
+            # Stop after 5 articles to keep it concise
+            if i >= 4:
+                break
+        
+        return summary
+    
+    def search_all_providers(self, query):
+        """Query every provider at once and merge whatever arrives before its deadline
+        
+        Returns (articles, timed_out_providers).
+        """
+        providers = ["newsapi", "gnews", "firefox"]
+        
+        start = time.monotonic()
+        futures = {name: self.provider_executor.submit(bind_context(self.call_provider), name, query)
+                   for name in providers}
+        
+        # Collect in deadline order so total latency is the slowest provider that made it
+        results = {}
+        timed_out_providers = []
+        for name in sorted(futures, key=lambda name: PROVIDER_DEADLINES[name]):
+            future = futures[name]
+            remaining = start + PROVIDER_DEADLINES[name] - time.monotonic()
+            wait([future], timeout=max(0, remaining))
+            
+            if not future.done():
+                logger.debug(f"Provider {name} missed its {PROVIDER_DEADLINES[name]}s deadline")
+                future.cancel()
+                timed_out_providers.append(name)
+                continue
+            
+            try:
+                results[name] = future.result()
+            except SearchCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Error searching {name}: {e}")
+        
+        # Stored articles answer instantly and fill in for providers that were slow or failed
+        results["local"] = self.article_store.search(query)
+        
+        # Merge in a fixed provider order so duplicates resolve the same way every time
+        merged = []
+        for name in providers + ["local"]:
+            for article in results.get(name, []):
+                article['provider'] = name
+                merged.append(article)
+        
+        return merged, timed_out_providers
+    
+    def canonical_url(self, url):
+        """Normalize an article URL so the same story from different providers compares equal"""
+        if not url:
+            return ""
+        parsed = urlparse(url.strip())
+        host = parsed.netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        query = [(key, value) for key, value in parse_qsl(parsed.query)
+                 if not key.lower().startswith(TRACKING_QUERY_PARAMS)]
+        path = parsed.path.rstrip("/")
+        canonical = f"{host}{path}"
+        if query:
+            canonical += "?" + urlencode(sorted(query))
+        return canonical
+    
+    @metrics.timed("dedupe")
+    def collapse_duplicates(self, articles):
+        """Keep one article per group of near-duplicate stories
+        
+        Syndicated copies of a story (same canonical URL, same title or
+        mostly the same words in title and snippet) are collapsed into the
+        copy with the most title and snippet text, which lists the other
+        outlets in also_reported_by. Grouping only needs the MinHash
+        features, so it runs before scoring and only representatives are
+        scored.
+        """
+        feature_sets = [near_duplicates.features(article.get('title', ''), article.get('snippet', ''))
+                        for article in articles]
+        exact_keys = [(self.canonical_url(article.get('link', '')),
+                       " ".join(re.findall(r"\w+", article.get('title', '').lower())))
+                      for article in articles]
+        
+        unique_articles = []
+        for group in near_duplicates.duplicate_groups(feature_sets, exact_keys):
+            # The first of the fullest copies represents the story
+            best = max(group, key=lambda i: (len(articles[i].get('title') or '') +
+                                             len(articles[i].get('snippet') or ''), -i))
+            representative = articles[best]
+            
+            others = []
+            for i in group:
+                source = articles[i].get('source')
+                if i != best and source and source != representative.get('source') and source not in others:
+                    others.append(source)
+            if len(group) > 1:
+                logger.debug(f"Collapsed {len(group) - 1} duplicates of: {representative.get('title')}")
+                representative['also_reported_by'] = others
+            unique_articles.append(representative)
+        
+        return unique_articles
+    
+    def search_newsapi(self, query, page=1):
+        """Search using NewsAPI.org"""
+        import requests
+        
+        cache_key = ResponseCache.make_key("newsapi", query, page)
+        data = self.response_cache.get(cache_key)
+        
+        if data is None:
+            self.scheduler.throttle("newsapi", PROVIDER_DEADLINES["newsapi"])
+            check_cancelled()
+            
+            # Spend quota, refusing the request once it is used up
+            if not self.api_tracker.try_consume("newsapi"):
+                logger.warning("NewsAPI quota exhausted")
+                return self.create_mock_results(query, "NewsAPI request limit reached")
+            
+            # Add exclusions for ads using NOT operator
+            url = f"https://newsapi.org/v2/everything?q={query} NOT advertisement NOT sponsored NOT promotion&sortBy=publishedAt&language=en&pageSize={PAGE_SIZE}&page={page}"
+            headers = {"X-Api-Key": NEWS_API_KEY}
+            
+            logger.debug(f"Searching NewsAPI with query: {query} (page {page})")
+            metrics.count("response_cache", provider="newsapi", result="miss")
+            with metrics.span("http", provider="newsapi"):
+                response = requests.get(url, headers=headers, timeout=PROVIDER_DEADLINES["newsapi"])
+                data = response.json()
+            
+            if response.status_code != 200:
+                logger.error(f"NewsAPI error: {data.get('message', 'Unknown error')}")
+                return self.create_mock_results(query, f"API Error: {data.get('message', 'Unknown error')}")
+            
+            self.response_cache.put(cache_key, data)
+        else:
+            logger.debug(f"NewsAPI cache hit for query: {query}")
+            metrics.count("response_cache", provider="newsapi", result="hit")
+        
+        with metrics.span("parse", provider="newsapi"):
+            return self.parse_newsapi_articles(data)
+    
+    def parse_newsapi_articles(self, data):
+        """Convert a NewsAPI response payload into articles"""
+        articles = []
+        for item in data.get("articles", []):
+            # Parse the date if available
+            published_date = ""
+            published = None
+            if item.get("publishedAt"):
+                try:
+                    date_obj = datetime.fromisoformat(item["publishedAt"].replace("Z", "+00:00"))
+                    published_date = date_obj.strftime("%b %d, %Y")
+                    published = date_obj.timestamp()
+                except:
+                    published_date = item["publishedAt"]
+            
+            source_name = item.get("source", {}).get("name", "Unknown Source")
+            snippet = item.get("description", "")
+            
+            # Try to determine bias from source first, then from content if needed
+            political_bias = self.determine_political_bias(source_name, snippet, item.get("url", ""))
+            
+            articles.append({
+                "title": item.get("title", "No title"),
+                "link": item.get("url", ""),
+                "source": source_name,
+                "time": published_date,
+                "published": published,
+                "snippet": snippet,
+                "rating": 3,  # Replaced by score_articles
+                "image": item.get("urlToImage", ""),
+                "political_bias": political_bias
+            })
+        
+        return articles
+    
+    def search_gnews(self, query, page=1):
+        """Search using GNews API"""
+        import requests
+        
+        cache_key = ResponseCache.make_key("gnews", query, page)
+        
+        try:
+            data = self.response_cache.get(cache_key)
+            
+            if data is None:
+                self.scheduler.throttle("gnews", PROVIDER_DEADLINES["gnews"])
+                check_cancelled()
+                
+                # Spend quota, refusing the request once it is used up
+                if not self.api_tracker.try_consume("gnews"):
+                    logger.warning("GNews quota exhausted")
+                    return self.create_mock_results(query, "GNews request limit reached")
+                
+                # Add exclusions for ads
+                url = f"https://gnews.io/api/v4/search?q={query} -advertisement -sponsored -promotion&lang=en&max={PAGE_SIZE}&page={page}&apikey={GNEWS_API_KEY}"
+                
+                metrics.count("response_cache", provider="gnews", result="miss")
+                with metrics.span("http", provider="gnews"):
+                    response = requests.get(url, timeout=PROVIDER_DEADLINES["gnews"])
+                    data = response.json()
+                
+                if "articles" not in data:
+                    logger.error(f"GNews API error: {data.get('errors', ['Unknown error'])}")
+                    return self.create_mock_results(query, f"API Error: {data.get('errors', ['Unknown error'])}")
+                
+                self.response_cache.put(cache_key, data)
+            else:
+                logger.debug(f"GNews cache hit for query: {query}")
+                metrics.count("response_cache", provider="gnews", result="hit")
+            
+            with metrics.span("parse", provider="gnews"):
+                return self.parse_gnews_articles(data)
+            
+        except (ProviderBusy, SearchCancelled):
+            raise
+        except Exception as e:
+            logger.error(f"GNews API error: {e}")
+            return self.create_mock_results(query, f"API Error: {str(e)}")
+    
+    def parse_gnews_articles(self, data):
+        """Convert a GNews response payload into articles"""
+        articles = []
+        for item in data.get("articles", []):
+            # Parse the date if available
+            published_date = ""
+            published = None
+            if item.get("publishedAt"):
+                try:
+                    date_obj = datetime.fromisoformat(item["publishedAt"].replace("Z", "+00:00"))
+                    published_date = date_obj.strftime("%b %d, %Y")
+                    published = date_obj.timestamp()
+                except:
+                    published_date = item["publishedAt"]
+            
+            source_name = item.get("source", {}).get("name", "Unknown Source")
+            snippet = item.get("description", "")
+            
+            # Try to determine bias from source first, then from content if needed
+            political_bias = self.determine_political_bias(source_name, snippet, item.get("url", ""))
+            
+            articles.append({
+                "title": item.get("title", "No title"),
+                "link": item.get("url", ""),
+                "source": source_name,
+                "time": published_date,
+                "published": published,
+                "snippet": snippet,
+                "rating": 3,  # Replaced by score_articles
+                "image": item.get("image", ""),
+                "political_bias": political_bias
+            })
+        
+        return articles
+    
+    def search_firefox(self, query, page=1):
+        """Search using Firefox with web scraping"""
+        import requests
+        
+        try:
+            # Format query for Firefox search - add "-ad -advertisement -sponsored" to exclude ads
+            search_url = f"https://news.search.yahoo.com/search?p={query}+-ad+-advertisement+-sponsored&b={(page - 1) * PAGE_SIZE + 1}"
+            
+            # Use Firefox user agent
+            headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.5",
+                "Accept-Encoding": "gzip, deflate, br",
+                "Connection": "keep-alive",
+                "Upgrade-Insecure-Requests": "1",
+                "Cache-Control": "max-age=0"
+            }
+            
+            logger.debug(f"Searching Yahoo News with query: {query}")
+            self.scheduler.throttle("firefox", PROVIDER_DEADLINES["firefox"])
+            with metrics.span("http", provider="yahoo"):
+                response = requests.get(search_url, headers=headers, timeout=PROVIDER_DEADLINES["firefox"])
+            
+            if response.status_code != 200:
+                logger.error(f"Yahoo News search error: Status code {response.status_code}")
+                return []
+            
+            articles = self.parse_results_page("yahoo", response)
+            
+            # If Yahoo News didn't work, try Bing News as fallback
+            if not articles:
+                logger.debug("Yahoo News extraction failed, trying Bing News")
+                articles = self.search_bing_news(query, page)
+            
+            return articles
+            
+        except (ProviderBusy, SearchCancelled):
+            raise
+        except Exception as e:
+            logger.error(f"Firefox search error: {e}")
+            logger.error(traceback.format_exc())
+            return []
+    
+    def parse_results_page(self, kind, response):
+        """Parse a "yahoo" or "bing" results page response, in the worker pool if there is one"""
+        with metrics.span("parse", provider=kind):
+            if self.worker_pool is None:
+                return RESULT_PAGE_PARSERS[kind](self, response.text)
+            try:
+                return self.worker_pool.run(parse_results_page, kind, response.content, response.encoding)
+            except BrokenExecutor as e:
+                # A worker died (the pool restarts itself); parse this page here
+                logger.error(f"Worker pool failed, parsing {kind} results in-process: {e}")
+                return RESULT_PAGE_PARSERS[kind](self, response.text)
+    
+    def parse_yahoo_articles(self, html):
+        """Extract articles from a Yahoo News search results page"""
+        from bs4 import BeautifulSoup
+        
+        # Parse the HTML
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract news articles
+        articles = []
+        
+        # Find news article containers
+        news_items = soup.select('div.NewsArticle')
+        
+        if not news_items:
+            # Try alternative selectors if the primary one doesn't work
+            news_items = soup.select('li.js-stream-content')
+        
+        if not news_items:
+            # Another fallback
+            news_items = soup.select('div.algo.news')
+        
+        logger.debug(f"Found {len(news_items)} news items")
+        
+        for i, item in enumerate(news_items[:PAGE_SIZE]):  # Limit to one page of results
+            try:
+                # Extract title and link
+                title_elem = item.select_one('h4') or item.select_one('h3') or item.select_one('.title')
+                link_elem = item.select_one('a')
+                
+                if not title_elem or not link_elem:
+                    continue
+                
+                title = title_elem.text.strip()
+                link = link_elem.get('href', '')
+                
+                # Extract source and time
+                source_elem = item.select_one('.s-source') or item.select_one('.provider')
+                time_elem = item.select_one('.s-time') or item.select_one('.datetime')
+                
+                source = source_elem.text.strip() if source_elem else "Unknown Source"
+                time = time_elem.text.strip() if time_elem else ""
+                
+                # Extract snippet
+                snippet_elem = item.select_one('.s-desc') or item.select_one('.abstract')
+                snippet = snippet_elem.text.strip() if snippet_elem else ""
+                
+                articles.append({
+                    'title': title,
+                    'link': link,
+                    'source': source,
+                    'time': time,
+                    'snippet': snippet,
+                    'rating': 3,  # Replaced by score_articles
+                    'image': "",
+                    'political_bias': self.determine_political_bias(source, snippet, link)
+                })
+                
+                logger.debug(f"Extracted article: {title}")
+                
+            except Exception as e:
+                logger.error(f"Error extracting article {i}: {e}")
+        
+        return articles
+    
+    def search_bing_news(self, query, page=1):
+        """Search using Bing News as a fallback for Firefox option"""
+        import requests
+        
+        try:
+            # Add exclusions for ads
+            search_url = f"https://www.bing.com/news/search?q={query}+-advertisement+-sponsored+-promotion&first={(page - 1) * PAGE_SIZE + 1}"
+            
+            headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
+            }
+            
+            self.scheduler.throttle("firefox", PROVIDER_DEADLINES["firefox"])
+            with metrics.span("http", provider="bing"):
+                response = requests.get(search_url, headers=headers, timeout=PROVIDER_DEADLINES["firefox"])
+            
+            if response.status_code != 200:
+                return []
+            
+            return self.parse_results_page("bing", response)
+            
+        except (ProviderBusy, SearchCancelled):
+            raise
+        except Exception:
+            return []
+    
+    def parse_bing_articles(self, html):
+        """Extract articles from a Bing News search results page"""
+        from bs4 import BeautifulSoup
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        articles = []
+        news_items = soup.select('.news-card')
+        
+        for item in news_items[:PAGE_SIZE]:
+            try:
+                title_elem = item.select_one('a.title')
+                if not title_elem:
+                    continue
+                    
+                title = title_elem.text.strip()
+                link = title_elem.get('href', '')
+                
+                source_elem = item.select_one('.source')
+                time_elem = item.select_one('.time')
+                
+                source = source_elem.text.strip() if source_elem else "Unknown Source"
+                time = time_elem.text.strip() if time_elem else ""
+                
+                snippet_elem = item.select_one('.snippet')
+                snippet = snippet_elem.text.strip() if snippet_elem else ""
+                
+                articles.append({
+                    'title': title,
+                    'link': link,
+                    'source': source,
+                    'time': time,
+                    'snippet': snippet,
+                    'rating': 3,  # Replaced by score_articles
+                    'image': "",
+                    'political_bias': self.determine_political_bias(source, snippet, link)
+                })
+                
+            except Exception:
+                continue
+        
+        return articles
+    
+    def create_mock_results(self, query, message=None):
+        """Create mock results when API is not available"""
+        mock_message = message or "API key required. This is mock data."
+        
+        return [
+            {
+                'title': f"Latest updates on {query}",
+                'link': f"https://news.google.com/search?q={query}",
+                'source': "News Source",
+                'time': "Today",
+                'snippet': f"{mock_message} Click to search for '{query}' on Google News.",
+                'rating': 3,
+                'image': "",
+                'political_bias': "Not applicable",
+                'mock': True
+            },
+            {
+                'title': f"How to get real news data for {query}",
+                'link': "https://newsapi.org/register",
+                'source': "NewsAPI.org",
+                'time': "",
+                'snippet': "Register for a free NewsAPI.org account to get real news data. The free tier allows 100 requests per day.",
+                'rating': 4,
+                'image': "",
+                'political_bias': "Not applicable",
+                'mock': True
+            }
+        ]
+
+
+RESULT_PAGE_PARSERS = {
+    "yahoo": NewsEngine.parse_yahoo_articles,
+    "bing": NewsEngine.parse_bing_articles
+}
+
+# Parsing only uses the module-level lexicons and bias index, so pool workers
+# use a bare engine without caches, stores or threads
+_worker_engine = None
+
+
+def parse_results_page(kind, content, encoding):
+    """Parse the raw bytes of a results page into articles (a worker pool task)"""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = object.__new__(NewsEngine)
+    html = content.decode(encoding or "utf-8", errors="replace")
+    return RESULT_PAGE_PARSERS[kind](_worker_engine, html)
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Search the news without the GUI")
+    parser.add_argument("query", help="Search query")
+    parser.add_argument("--provider", choices=PROVIDERS, default="newsapi", help="News source to query")
+    parser.add_argument("--deep", action="store_true", help="Fetch several result pages per provider")
+    parser.add_argument("--enhance", action="store_true", help="Fetch article pages for the top results")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Time every stage and write the metrics to PATH (Prometheus text if it ends in .prom, else JSON)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
+    if args.metrics:
+        from stage_metrics import current_trace
+        metrics.enable()
+        trace = metrics.trace()
+        current_trace.set(trace)
+    
+    engine = NewsEngine()
+    if args.deep:
+        result = engine.deep_search(args.query, args.provider)
+    else:
+        result = engine.search(args.query, args.provider)
+    articles = result.articles
+    if args.enhance:
+        articles = engine.enhance_top_articles(articles[:3]) + articles[3:]
+    if args.metrics:
+        logger.info(trace.text())
+        metrics.write(args.metrics)
+    print(json.dumps({
+        "query": result.query,
+        "provider": result.provider,
+        "filtered_count": result.filtered_count,
+        "timed_out_providers": result.timed_out_providers,
+        "articles": articles
+    }, indent=2))
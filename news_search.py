@@ -1,50 +1,23 @@
+from startup_timing import startup_timer
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import requests
-import threading
-import webbrowser
-import traceback
 import logging
-import json
-from datetime import datetime
 import os
-from bs4 import BeautifulSoup
-import re
-import numpy as np
-from collections import Counter
-import string
+from news_engine import NewsEngine
+from api_usage import NEWS_API_LIMIT, GNEWS_API_LIMIT
+from results_document import RESULTS_PAGE_SIZE, build_details, build_results, tk_length
+from worker_pool import PARSER_WARM_MODULES, WorkerPool
+from stage_metrics import METRICS_DIR_ENV, METRICS_ENV, metrics
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG, 
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[logging.StreamHandler()])
 logger = logging.getLogger(__name__)
 
-# Political bias sources mapping
-LEFT_LEANING_SOURCES = [
-    "cnn", "msnbc", "nbc", "abc", "cbs", "new york times", "nyt", "washington post", 
-    "huffpost", "huffington post", "vox", "slate", "the guardian", "mother jones", 
-    "the atlantic", "politico", "buzzfeed", "daily beast", "time magazine"
-]
-
-RIGHT_LEANING_SOURCES = [
-    "fox news", "breitbart", "the daily caller", "the blaze", "newsmax", "oann", 
-    "new york post", "washington times", "washington examiner", "national review", 
-    "the federalist", "daily wire", "epoch times", "townhall"
-]
-
-CENTRIST_SOURCES = [
-    "reuters", "associated press", "ap", "bloomberg", "the hill", "axios", "c-span", 
-    "bbc", "financial times", "wall street journal", "wsj", "usa today", "christian science monitor"
-]
-
-# API keys
-NEWS_API_KEY = "Your_API_key"
-GNEWS_API_KEY = "Your_API_key"
-
-# API limits
-NEWS_API_LIMIT = 100  # NewsAPI free tier: 100 requests per day
-GNEWS_API_LIMIT = 100  # GNews free tier: 100 requests per day
+# Number of top articles enhanced and shown in the quick summary
+SUMMARY_ARTICLES = 3
+WORKER_PROCESSES = 2  # Worker processes parsing results pages; the GUI never summarizes in them
+WORKER_START_DELAY_MS = 1000  # Workers are spawned this long after startup, off the critical path
+SUGGEST_DEBOUNCE_MS = 150  # Pause in typing before suggestions are looked up
+SUGGEST_NAVIGATION_KEYS = {"Return", "Escape", "Up", "Down", "Tab", "Shift_L", "Shift_R",
+                           "Control_L", "Control_R", "Alt_L", "Alt_R"}
 
 # Available themes
 THEMES = {
@@ -110,83 +83,21 @@ THEMES = {
     }
 }
 
-class ApiUsageTracker:
-    """Track API usage across sessions"""
-    
-    def __init__(self):
-        self.usage_file = "api_usage.json"
-        self.usage = self.load_usage()
-    
-    def load_usage(self):
-        """Load usage data from file"""
-        if os.path.exists(self.usage_file):
-            try:
-                with open(self.usage_file, 'r') as f:
-                    return json.load(f)
-            except:
-                logger.error("Failed to load API usage data")
-        
-        # Default usage data
-        return {
-            "newsapi": {
-                "count": 0,
-                "date": datetime.now().strftime("%Y-%m-%d")
-            },
-            "gnews": {
-                "count": 0,
-                "date": datetime.now().strftime("%Y-%m-%d")
-            }
-        }
-    
-    def save_usage(self):
-        """Save usage data to file"""
-        try:
-            with open(self.usage_file, 'w') as f:
-                json.dump(self.usage, f)
-        except:
-            logger.error("Failed to save API usage data")
-    
-    def increment_usage(self, api_name):
-        """Increment usage count for the specified API"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Reset counter if it's a new day
-        if self.usage[api_name]["date"] != today:
-            self.usage[api_name]["count"] = 0
-            self.usage[api_name]["date"] = today
-        
-        # Increment counter
-        self.usage[api_name]["count"] += 1
-        self.save_usage()
-        
-        return self.usage[api_name]["count"]
-    
-    def get_usage(self, api_name):
-        """Get current usage count for the specified API"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Reset counter if it's a new day
-        if self.usage[api_name]["date"] != today:
-            self.usage[api_name]["count"] = 0
-            self.usage[api_name]["date"] = today
-            self.save_usage()
-        
-        return self.usage[api_name]["count"]
-    
-    def get_remaining(self, api_name):
-        """Get remaining requests for the specified API"""
-        limit = NEWS_API_LIMIT if api_name == "newsapi" else GNEWS_API_LIMIT
-        return limit - self.get_usage(api_name)
-
 class NewsSearchApp:
     def __init__(self, root):
         self.root = root
         self.root.title("News Search")
         
-        # Initialize API usage tracker
-        self.api_tracker = ApiUsageTracker()
+        # Stage timing feeds the status bar breakdown and the optional metrics export
+        if os.environ.get(METRICS_ENV) != "0":
+            metrics.enable()
+        self.search_trace = None
         
-        # No longer using external text summarizer
+        # Search pipeline (providers, ranking, bias, enhancement) lives in the engine;
+        # CPU-heavy parsing runs in worker processes so it never stalls the Tk main loop
+        self.engine = NewsEngine(worker_pool=WorkerPool(WORKER_PROCESSES, PARSER_WARM_MODULES))
+        self.root.after(WORKER_START_DELAY_MS, self.engine.worker_pool.start)
+        self._search_loop = None
         
         # Set default theme
         self.current_theme = "dark"
@@ -252,6 +163,39 @@ class NewsSearchApp:
                                           command=self.update_usage_display)
         self.firefox_radio.pack(side=tk.LEFT, padx=5)
         
+        self.local_radio = tk.Radiobutton(self.api_frame, 
+                                         text="Local", 
+                                         variable=self.api_var, 
+                                         value="local",
+                                         bg=THEMES[self.current_theme]["bg"], 
+                                         fg=THEMES[self.current_theme]["fg"], 
+                                         selectcolor=THEMES[self.current_theme]["entry_bg"], 
+                                         activebackground=THEMES[self.current_theme]["bg"],
+                                         command=self.update_usage_display)
+        self.local_radio.pack(side=tk.LEFT, padx=5)
+        
+        self.all_radio = tk.Radiobutton(self.api_frame, 
+                                       text="All", 
+                                       variable=self.api_var, 
+                                       value="all",
+                                       bg=THEMES[self.current_theme]["bg"], 
+                                       fg=THEMES[self.current_theme]["fg"], 
+                                       selectcolor=THEMES[self.current_theme]["entry_bg"], 
+                                       activebackground=THEMES[self.current_theme]["bg"],
+                                       command=self.update_usage_display)
+        self.all_radio.pack(side=tk.LEFT, padx=5)
+        
+        # Deep search fetches several result pages per provider
+        self.deep_var = tk.BooleanVar(value=False)
+        self.deep_check = tk.Checkbutton(self.api_frame,
+                                         text="Deep",
+                                         variable=self.deep_var,
+                                         bg=THEMES[self.current_theme]["bg"],
+                                         fg=THEMES[self.current_theme]["fg"],
+                                         selectcolor=THEMES[self.current_theme]["entry_bg"],
+                                         activebackground=THEMES[self.current_theme]["bg"])
+        self.deep_check.pack(side=tk.LEFT, padx=5)
+        
         # API usage display
         self.usage_var = tk.StringVar()
         self.usage_label = tk.Label(self.api_frame,
@@ -279,6 +223,25 @@ class NewsSearchApp:
         self.search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         self.search_entry.bind("<Return>", self.search)
         
+        # Type-ahead suggestions from past searches and seen articles
+        self.suggest_job = None
+        self.suggestion_popup = tk.Toplevel(self.root)
+        self.suggestion_popup.wm_overrideredirect(True)
+        self.suggestion_popup.withdraw()
+        self.suggestion_list = tk.Listbox(self.suggestion_popup,
+                                          font=('Arial', 11),
+                                          activestyle="none",
+                                          bg=THEMES[self.current_theme]["entry_bg"],
+                                          fg=THEMES[self.current_theme]["entry_fg"])
+        self.suggestion_list.pack(fill=tk.BOTH, expand=True)
+        self.search_entry.bind("<KeyRelease>", self.schedule_suggestions)
+        self.search_entry.bind("<Down>", self.focus_suggestions)
+        self.search_entry.bind("<Escape>", self.hide_suggestions)
+        self.search_entry.bind("<FocusOut>", lambda e: self.root.after(SUGGEST_DEBOUNCE_MS, self.hide_unfocused_suggestions))
+        self.suggestion_list.bind("<Return>", self.accept_suggestion)
+        self.suggestion_list.bind("<ButtonRelease-1>", self.accept_suggestion)
+        self.suggestion_list.bind("<Escape>", self.hide_suggestions)
+        
         # Search button with magnifier icon
         self.search_button = tk.Button(self.search_frame, 
                                       text="🔍", 
@@ -326,8 +289,18 @@ class NewsSearchApp:
                                   bg=THEMES[self.current_theme]["entry_bg"],
                                   fg=THEMES[self.current_theme]["fg"])
         
-        # Store clickable links
-        self.links = []
+        # Store clickable links, keyed by the unique tag of each link so they
+        # survive text being patched in above them
+        self.results_text.link_urls = {}
+        self.results_text.tag_bind("more_results", "<Button-1>", self.show_more_results)
+        self.shown_articles = []
+        self.shown_count = 0
+        
+        # Tcl 8.6 counts characters outside the BMP (emoji) as two when indexing
+        self.text_length = tk_length if tk.TclVersion < 8.7 else len
+        
+        # Incremented on every search so late updates from an older search are ignored
+        self.search_generation = 0
         
         from open_link import open_link
         self.results_text.tag_bind("link", "<Button-1>", open_link)
@@ -358,95 +331,39 @@ class NewsSearchApp:
         self.results_text.insert(tk.END, message, "error")
         self.status_var.set("Ready")
     
-    def determine_political_bias(self, source_name, content=None):
-        """Determine the political bias of a news source or content"""
-        if not source_name and not content:
-            return "Not applicable"
-            
-        # First check source name
-        if source_name:
-            source_lower = source_name.lower()
-            
-            # Check for exact matches first
-            for source in LEFT_LEANING_SOURCES:
-                if source == source_lower:
-                    return "Mostly left leaning"
-                    
-            for source in RIGHT_LEANING_SOURCES:
-                if source == source_lower:
-                    return "Mostly right leaning"
-                    
-            for source in CENTRIST_SOURCES:
-                if source == source_lower:
-                    return "Mostly central"
-            
-            # Check for partial matches
-            for source in LEFT_LEANING_SOURCES:
-                if source in source_lower or source_lower in source:
-                    return "Slightly left leaning"
-                    
-            for source in RIGHT_LEANING_SOURCES:
-                if source in source_lower or source_lower in source:
-                    return "Slightly right leaning"
-                    
-            for source in CENTRIST_SOURCES:
-                if source in source_lower or source_lower in source:
-                    return "Mostly central"
-        
-        # If we couldn't determine bias from source, analyze content if available
-        if content:
-            content_lower = content.lower()
-            
-            # Count occurrences of politically charged terms
-            left_count = 0
-            right_count = 0
-            
-            for term in LEFT_LEANING_TERMS:
-                if term in content_lower:
-                    left_count += 1
-                    
-            for term in RIGHT_LEANING_TERMS:
-                if term in content_lower:
-                    right_count += 1
-            
-            # Determine bias based on term frequency
-            if left_count > right_count:
-                if left_count >= right_count + 3:
-                    return "Mostly left leaning"
-                else:
-                    return "Slightly left leaning"
-            elif right_count > left_count:
-                if right_count >= left_count + 3:
-                    return "Mostly right leaning"
-                else:
-                    return "Slightly right leaning"
-            elif left_count > 0 or right_count > 0:
-                return "Mostly central"
-                
-        return "Not applicable"
-
     def update_usage_display(self):
         """Update the API usage display"""
         api_name = self.api_var.get()
+        quota_apis = self.engine.quota_apis(api_name)
         
-        if api_name == "firefox":
-            # Firefox scraping doesn't have a usage limit
+        if not quota_apis:
+            # Firefox scraping and the local store don't have a usage limit
             self.usage_var.set("No API limit")
             self.usage_label.config(fg=THEMES[self.current_theme]["fg"])
             return
-            
-        usage = self.api_tracker.get_usage(api_name)
-        limit = NEWS_API_LIMIT if api_name == "newsapi" else GNEWS_API_LIMIT
-        remaining = limit - usage
+        
+        usage_parts = []
+        lowest_remaining = None
+        for quota_api in quota_apis:
+            usage = self.engine.api_tracker.get_usage(quota_api)
+            limit = NEWS_API_LIMIT if quota_api == "newsapi" else GNEWS_API_LIMIT
+            remaining = limit - usage
+            usage_parts.append((usage, limit, remaining))
+            if lowest_remaining is None or remaining < lowest_remaining:
+                lowest_remaining = remaining
         
         # Format the usage text
-        usage_text = f"Usage: {usage}/{limit} ({remaining} left)"
+        if len(usage_parts) == 1:
+            usage, limit, remaining = usage_parts[0]
+            usage_text = f"Usage: {usage}/{limit} ({remaining} left)"
+        else:
+            usage_text = "Usage: " + " • ".join(f"{usage}/{limit}" for usage, limit, _ in usage_parts)
         
         # Update the label text
         self.usage_var.set(usage_text)
         
         # Change color if running low
-        if remaining <= 15:
+        if lowest_remaining <= 15:
             self.usage_label.config(fg=THEMES[self.current_theme]["warning_color"])
         else:
             self.usage_label.config(fg=THEMES[self.current_theme]["fg"])
@@ -493,6 +410,11 @@ class NewsSearchApp:
                 insertbackground=theme["fg"]
             )
             
+            self.suggestion_list.config(
+                bg=theme["entry_bg"],
+                fg=theme["entry_fg"]
+            )
+            
             self.search_button.config(
                 bg=theme["button_bg"],
                 fg=theme["button_fg"],
@@ -523,12 +445,12 @@ class NewsSearchApp:
             
             # Update API frame widgets
             for widget in self.api_frame.winfo_children():
-                if isinstance(widget, tk.Label) or isinstance(widget, tk.Radiobutton):
+                if isinstance(widget, (tk.Label, tk.Radiobutton, tk.Checkbutton)):
                     widget.config(
                         bg=theme["bg"],
                         fg=theme["fg"]
                     )
-                    if isinstance(widget, tk.Radiobutton):
+                    if isinstance(widget, (tk.Radiobutton, tk.Checkbutton)):
                         widget.config(
                             selectcolor=theme["entry_bg"],
                             activebackground=theme["bg"]
@@ -536,9 +458,9 @@ class NewsSearchApp:
             
             # Update usage label color if needed
             api_name = self.api_var.get()
-            remaining = self.api_tracker.get_remaining(api_name)
-            if remaining <= 15:
-                self.usage_label.config(fg=theme["warning_color"])
+            for quota_api in self.engine.quota_apis(api_name):
+                if self.engine.api_tracker.get_remaining(quota_api) <= 15:
+                    self.usage_label.config(fg=theme["warning_color"])
     
     def change_theme(self, event=None):
         """Change the application theme"""
@@ -559,577 +481,260 @@ class NewsSearchApp:
         if not query:
             return
         
+        self.hide_suggestions()
+        
         # Expand UI if not already expanded
         self.expand_ui()
         
         # Clear previous results
+        self.search_generation += 1
         self.results_text.delete(1.0, tk.END)
-        self.links = []
+        self.results_text.link_urls = {}
         self.status_var.set("Searching for: " + query)
         
-        # Start search in a separate thread to keep UI responsive
-        threading.Thread(target=self.perform_search, args=(query,), daemon=True).start()
+        # Read the provider on the UI thread, then search on the background loop to keep UI responsive.
+        # Starting a search cancels the previous one, and every callback is handed back to the UI
+        # thread tagged with its generation so results of an older search never render.
+        provider = self.api_var.get()
+        deep = self.deep_var.get()
+        generation = self.search_generation
+        self.search_trace = metrics.trace()
+        self.search_loop.submit(
+            generation, query, provider, deep, enhance_count=SUMMARY_ARTICLES,
+            on_update=lambda partial: self.root.after(0, self.show_results, partial, generation),
+            on_results=lambda result: self.root.after(0, self.receive_results, result, generation),
+            on_enhanced=lambda index, article: self.root.after(
+                0, self.patch_enhanced_article, generation, index, article),
+            on_done=lambda result: self.root.after(0, self.finish_search, generation, result),
+            on_error=lambda error: self.root.after(0, self.show_error, error, generation),
+            trace=self.search_trace)
     
-    def is_advertisement(self, article):
-        """Check if an article is likely an advertisement"""
-        # Check title and snippet for ad indicators
-        text_to_check = (article.get('title', '') + ' ' + article.get('snippet', '') + ' ' + 
-                            article.get('source', '')).lower()
-        
-        # Check for ad indicators
-        for indicator in AD_INDICATORS:
-            if indicator.lower() in text_to_check:
-                return True
-                
-        # Check for suspicious URLs
-        link = article.get('link', '').lower()
-        if link and ('product' in link or 'shop' in link or 'buy' in link or 'offer' in link or 
-                    'deal' in link or 'sale' in link or 'discount' in link):
-            return True
-            
-        return False
-
-    def enhance_top_articles(self, articles):
-        """Fetch additional content for top articles to enhance the summary"""
-        enhanced_articles = []
-        
-        for article in articles:
-            try:
-                # Skip if article is an advertisement
-                if self.is_advertisement(article):
-                    logger.debug(f"Skipping advertisement: {article.get('title')}")
-                    continue
-                    
-                # Create a copy of the article to avoid modifying the original
-                enhanced_article = article.copy()
-                
-                # Only try to enhance if we have a valid URL
-                if enhanced_article.get('link') and enhanced_article['link'].startswith('http'):
-                    # Fetch the article content
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                    }
-                    response = requests.get(enhanced_article['link'], headers=headers, timeout=3)
-                    
-                    if response.status_code == 200:
-                        # Parse the HTML
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        
-                        # Try to extract the main content
-                        # First, look for article tags
-                        article_content = soup.find('article')
-                        
-                        # If no article tag, try common content containers
-                        if not article_content:
-                            article_content = soup.find('div', class_=['content', 'article-content', 'story-content', 'entry-content', 'post-content'])
-                        
-                        if article_content:
-                            # Extract paragraphs
-                            paragraphs = article_content.find_all('p')
-                            
-                            # Get the first few paragraphs
-                            content = ""
-                            full_content = ""
-                            for p in paragraphs[:5]:  # First 5 paragraphs for full analysis
-                                text = p.get_text().strip()
-                                full_content += text + " "
-                                if len(content) < 200:  # Only add to visible content if under limit
-                                    content += text + " "
-                            
-                            # Check if the full content suggests this is an ad
-                            if any(indicator.lower() in full_content.lower() for indicator in AD_INDICATORS):
-                                logger.debug(f"Skipping advertisement detected from content: {enhanced_article.get('title')}")
-                                continue
-                            
-                            # Truncate visible content to a reasonable length
-                            if content:
-                                content = content[:200] + "..." if len(content) > 200 else content
-                                enhanced_article['enhanced_content'] = content
-                                
-                                # If political bias is "Not applicable", try to determine from content
-                                if enhanced_article.get('political_bias') == "Not applicable" and full_content:
-                                    new_bias = self.determine_political_bias(None, full_content)
-                                    if new_bias != "Not applicable":
-                                        enhanced_article['political_bias'] = new_bias + " (content analysis)"
-                
-                enhanced_articles.append(enhanced_article)
-                
-            except Exception as e:
-                # If enhancement fails, just use the original article
-                logger.error(f"Error enhancing article: {e}")
-                enhanced_articles.append(article)
-                
-        return enhanced_articles
+    def schedule_suggestions(self, event=None):
+        """Look up suggestions once typing pauses, so a fast typist doesn't trigger one lookup per key"""
+        if event is not None and event.keysym in SUGGEST_NAVIGATION_KEYS:
+            return
+        if self.suggest_job is not None:
+            self.root.after_cancel(self.suggest_job)
+        self.suggest_job = self.root.after(SUGGEST_DEBOUNCE_MS, self.show_suggestions)
     
-    def generate_summary(self, query, articles):
-        """Generate a brief summary of the news results as a bulleted list"""
-        if not articles:
-            return "No relevant information found."
-        
-        # Create a simple bulleted list summary
-        summary = f"Top stories about '{query}':\n\n"
-        
-        # Try to fetch additional content for top articles
-        enhanced_articles = self.enhance_top_articles(articles[:3])
-        
-        # Extract key information from each article
-        for i, article in enumerate(enhanced_articles):  # Limit to top 5 articles
-            # Get the source and date
-            source_info = f"{article['source']}"
-            if article['time']:
-                source_info += f" ({article['time']})"
-                
-            # Get the title or a snippet
-            headline = article['title']
-            
-            # Add relevance stars
-            stars = "★" * article['rating'] + "☆" * (5 - article['rating'])
-            
-            # Get political bias
-            political_bias = article.get('political_bias', 'Not applicable')
-            
-            # Add to summary with bullet point, relevance rating and political bias
-            summary += f"• {headline}\n  {source_info} • Relevance: {stars} • Bias: {political_bias}\n"
-            
-            # Add enhanced content if available
-            if article.get('enhanced_content'):
-                summary += f"  Key points: {article['enhanced_content']}\n"
-            
-            summary += "\n"
-            
-            # Stop after 5 articles to keep it concise
-            if i >= 4:
-                break
+    def show_suggestions(self):
+        """Show suggestions for the typed text below the search entry (local index only, no provider calls)"""
+        self.suggest_job = None
+        suggestions = self.engine.suggest(self.search_var.get())
+        if not suggestions:
+            self.hide_suggestions()
+            return
         
-        return summary
+        self.suggestion_list.delete(0, tk.END)
+        self.suggestion_list.insert(tk.END, *suggestions)
+        self.suggestion_list.config(height=len(suggestions))
+        x = self.search_entry.winfo_rootx()
+        y = self.search_entry.winfo_rooty() + self.search_entry.winfo_height()
+        self.suggestion_popup.geometry(f"{self.search_entry.winfo_width()}x{self.suggestion_list.winfo_reqheight()}+{x}+{y}")
+        self.suggestion_popup.deiconify()
+        self.suggestion_popup.lift()
     
-    def display_results(self, query, articles):
-        if not articles:
-            self.update_results("No relevant news found.")
+    def hide_suggestions(self, event=None):
+        if self.suggest_job is not None:
+            self.root.after_cancel(self.suggest_job)
+            self.suggest_job = None
+        self.suggestion_popup.withdraw()
+    
+    def hide_unfocused_suggestions(self):
+        """Hide the suggestions when focus left the entry for anything but the suggestion list"""
+        if self.root.focus_get() is not self.suggestion_list:
+            self.hide_suggestions()
+    
+    def focus_suggestions(self, event=None):
+        """Move from the entry into the suggestion list with the Down key"""
+        if self.suggestion_popup.winfo_viewable():
+            self.suggestion_list.focus_set()
+            self.suggestion_list.selection_clear(0, tk.END)
+            self.suggestion_list.selection_set(0)
+            self.suggestion_list.activate(0)
+        return "break"
+    
+    def accept_suggestion(self, event=None):
+        """Search for the chosen suggestion"""
+        selection = self.suggestion_list.curselection()
+        if not selection:
             return
-
-        self.results_text.insert(tk.END, f"Search Results for: {query}\n\n", "title")
-
-        # Display a summary first
-        self.results_text.insert(tk.END, "QUICK SUMMARY (Sorted by Relevance):\n", "title")
-        summary = self.generate_summary(query, articles)
-        self.results_text.insert(tk.END, f"{summary}\n", "summary")
-
-        # Display individual articles
-        self.results_text.insert(tk.END, "FULL ARTICLE DETAILS (Sorted by Relevance):\n\n", "title")
-
-        for i, article in enumerate(articles):
-            # Insert title as a clickable link
-            self.results_text.insert(tk.END, f"{i+1}. {article['title']}\n", "title")
-            
-            # Insert source and time
-            source_time = f"{article['source']}"
-            if article['time']:
-                source_time += f" • {article['time']}"
-            self.results_text.insert(tk.END, f"{source_time}\n", "summary")
-            
-            # Insert snippet
-            if article['snippet']:
-                self.results_text.insert(tk.END, f"{article['snippet']}\n", "summary")
-            
-            # Insert link
-            link_start = self.results_text.index(tk.INSERT)
-            self.results_text.insert(tk.END, "Read more", "link")
-            link_end = self.results_text.index(tk.INSERT)
-            self.links.append((link_start, link_end, article['link']))
-            
-            # Insert rating
-            stars = "★" * article['rating'] + "☆" * (5 - article['rating'])
-            self.results_text.insert(tk.END, f" • Relevance: {stars}", "rating")
-            
-            # Insert political bias
-            political_bias = article.get('political_bias', 'Not applicable')
-            self.results_text.insert(tk.END, f" • Political Bias: {political_bias}\n\n", "rating")
-
-        self.status_var.set(f"Found {len(articles)} news articles about {query}")
-
-    def perform_search(self, query):
-        try:
-            api_choice = self.api_var.get()
-            
-            if api_choice == "newsapi":
-                articles = self.search_newsapi(query)
-            elif api_choice == "gnews":
-                articles = self.search_gnews(query)
-            else:  # firefox
-                articles = self.search_firefox(query)
-            
-            # Filter out advertisements
-            original_count = len(articles)
-            articles = [article for article in articles if not self.is_advertisement(article)]
-            filtered_count = original_count - len(articles)
-            
-            if filtered_count > 0:
-                logger.debug(f"Filtered out {filtered_count} advertisements")
-            
-            # Sort articles by relevance score (rating) in descending order
-            if articles:
-                articles.sort(key=lambda x: x['rating'], reverse=True)
-            
-            # Update usage display
-            self.root.after(0, self.update_usage_display)
-            
-            if articles:
-                # Update status to show we're enhancing articles
-                status_msg = f"Found {len(articles)} articles"
-                if filtered_count > 0:
-                    status_msg += f" (filtered {filtered_count} ads)"
-                status_msg += ", enhancing summaries..."
-                self.root.after(0, lambda: self.status_var.set(status_msg))
-                
-                # Update the UI with results
-                self.root.after(0, lambda: self.display_results(query, articles))
-            else:
-                self.root.after(0, lambda: self.update_results(
-                    f"No news found for '{query}'. Try a different search term or API source."
-                ))
-            
-        except Exception as e:
-            logger.error(f"Error in search: {e}")
-            logger.error(traceback.format_exc())
-            self.root.after(0, lambda: self.update_results(
-                f"Error searching: {str(e)}\n\n" +
-                "See console for detailed error information."
-            ))
+        self.search_var.set(self.suggestion_list.get(selection[0]))
+        self.search_entry.icursor(tk.END)
+        self.search_entry.focus_set()
+        self.search()
+    
+    @property
+    def search_loop(self):
+        """Background event loop running the searches, started on first use to keep startup fast"""
+        if self._search_loop is None:
+            from search_loop import SearchLoop
+            self._search_loop = SearchLoop(self.engine, metrics_dir=os.environ.get(METRICS_DIR_ENV))
+        return self._search_loop
+    
+    def render_document(self, document):
+        """Append a prebuilt results document with one insert and one tag_add per tag"""
+        text = self.results_text
+        base_line, base_column = map(int, text.index("end-1c").split("."))
+        
+        def index(position):
+            line, column = position
+            return f"{base_line + line}.{column + base_column if line == 0 else column}"
+        
+        text.insert(tk.END, document.text)
+        for tag, ranges in document.tags.items():
+            text.tag_add(tag, *map(index, ranges))
+        for name, position in document.marks.items():
+            text.mark_set(name, index(position))
+            text.mark_gravity(name, tk.LEFT)
+        text.link_urls.update(document.links)
     
-    def search_newsapi(self, query):
-        """Search using NewsAPI.org"""
-        # Increment usage counter
-        self.api_tracker.increment_usage("newsapi")
+    def display_results(self, result, generation):
+        """Render headlines immediately; key points are patched in as enhancement completes"""
+        if generation != self.search_generation:
+            return
         
-        # Add exclusions for ads using NOT operator
-        url = f"https://newsapi.org/v2/everything?q={query} NOT advertisement NOT sponsored NOT promotion&sortBy=publishedAt&language=en&pageSize=10"
-        headers = {"X-Api-Key": NEWS_API_KEY}
+        articles = result.articles
+        if not articles:
+            self.update_results("No relevant news found.")
+            return
         
-        logger.debug(f"Searching NewsAPI with query: {query}")
-        response = requests.get(url, headers=headers)
-        data = response.json()
+        # Long result lists are rendered a page at a time
+        self.shown_articles = articles
+        self.shown_count = min(len(articles), RESULTS_PAGE_SIZE)
+        with metrics.span("render", trace=self.search_trace, items=self.shown_count):
+            self.render_document(build_results(result.query, articles, SUMMARY_ARTICLES, RESULTS_PAGE_SIZE,
+                                               self.text_length))
+    
+    def show_more_results(self, event=None):
+        """Replace the "Show more" link with the next page of article details"""
+        ranges = self.results_text.tag_ranges("more_results")
+        if not ranges:
+            return "break"
+        self.results_text.delete(ranges[0], f"{ranges[-1]}+1c")
+        with metrics.span("render", items=min(RESULTS_PAGE_SIZE, len(self.shown_articles) - self.shown_count)):
+            self.render_document(build_details(self.shown_articles, self.shown_count, RESULTS_PAGE_SIZE,
+                                               SUMMARY_ARTICLES, self.text_length))
+        self.shown_count = min(len(self.shown_articles), self.shown_count + RESULTS_PAGE_SIZE)
+        return "break"
+    
+    def show_results(self, result, generation):
+        """Replace whatever is shown with result, e.g. as deep search pages arrive"""
+        if generation != self.search_generation:
+            return
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.link_urls = {}
+        self.display_results(result, generation)
+    
+    def replace_tagged_text(self, tag, text, tags):
+        """Replace the text carrying a unique tag, keeping the tag on the new text"""
+        ranges = self.results_text.tag_ranges(tag)
+        if not ranges:
+            return
+        start, end = ranges[0], ranges[1]
+        self.results_text.delete(start, end)
+        self.results_text.insert(start, text, tags + (tag,))
+    
+    def patch_enhanced_article(self, generation, index, article):
+        """Patch the enhancement result for one summary article into the rendered results"""
+        if generation != self.search_generation:
+            return
         
-        if response.status_code != 200:
-            logger.error(f"NewsAPI error: {data.get('message', 'Unknown error')}")
-            return self.create_mock_results(query, f"API Error: {data.get('message', 'Unknown error')}")
+        if article is None:
+            # The page turned out to be an advertisement, drop it from the summary
+            ranges = self.results_text.tag_ranges(f"summary_entry{index}")
+            if ranges:
+                self.results_text.delete(ranges[0], ranges[-1])
+            return
         
-        articles = []
-        for item in data.get("articles", []):
-            # Parse the date if available
-            published_date = ""
-            if item.get("publishedAt"):
-                try:
-                    date_obj = datetime.fromisoformat(item["publishedAt"].replace("Z", "+00:00"))
-                    published_date = date_obj.strftime("%b %d, %Y")
-                except:
-                    published_date = item["publishedAt"]
-            
-            source_name = item.get("source", {}).get("name", "Unknown Source")
-            snippet = item.get("description", "")
-            
-            # Try to determine bias from source first, then from content if needed
-            political_bias = self.determine_political_bias(source_name, snippet)
-            
-            articles.append({
-                "title": item.get("title", "No title"),
-                "link": item.get("url", ""),
-                "source": source_name,
-                "time": published_date,
-                "snippet": snippet,
-                "rating": self.calculate_rating(item),
-                "image": item.get("urlToImage", ""),
-                "political_bias": political_bias
-            })
+        if article.get('enhanced_content'):
+            self.results_text.insert(f"key_points{index}", f"  Key points: {article['enhanced_content']}\n",
+                                     ("enhanced", f"summary_entry{index}"))
         
-        return articles
+        # Content analysis may have refined the bias
+        political_bias = article.get('political_bias', 'Not applicable')
+        self.replace_tagged_text(f"summary_bias{index}", political_bias, ("summary", f"summary_entry{index}"))
+        self.replace_tagged_text(f"detail_bias{index}", political_bias, ("rating",))
     
-    def search_gnews(self, query):
-        """Search using GNews API"""
-        # Increment usage counter
-        self.api_tracker.increment_usage("gnews")
-        
-        # Add exclusions for ads
-        url = f"https://gnews.io/api/v4/search?q={query} -advertisement -sponsored -promotion&lang=en&max=10&apikey={GNEWS_API_KEY}"
+    def finish_search(self, generation, result):
+        """Show the final status once enhancement has finished"""
+        if generation != self.search_generation or not result.articles:
+            return
         
-        try:
-            response = requests.get(url)
-            data = response.json()
-            
-            if "articles" not in data:
-                logger.error(f"GNews API error: {data.get('errors', ['Unknown error'])}")
-                return self.create_mock_results(query, f"API Error: {data.get('errors', ['Unknown error'])}")
-            
-            articles = []
-            for item in data.get("articles", []):
-                # Parse the date if available
-                published_date = ""
-                if item.get("publishedAt"):
-                    try:
-                        date_obj = datetime.fromisoformat(item["publishedAt"].replace("Z", "+00:00"))
-                        published_date = date_obj.strftime("%b %d, %Y")
-                    except:
-                        published_date = item["publishedAt"]
-                
-                source_name = item.get("source", {}).get("name", "Unknown Source")
-                snippet = item.get("description", "")
-                
-                # Try to determine bias from source first, then from content if needed
-                political_bias = self.determine_political_bias(source_name, snippet)
-                
-                articles.append({
-                    "title": item.get("title", "No title"),
-                    "link": item.get("url", ""),
-                    "source": source_name,
-                    "time": published_date,
-                    "snippet": snippet,
-                    "rating": 3,  # Default rating for GNews
-                    "image": item.get("image", ""),
-                    "political_bias": political_bias
-                })
-            
-            return articles
-            
-        except Exception as e:
-            logger.error(f"GNews API error: {e}")
-            return self.create_mock_results(query, f"API Error: {str(e)}")
-            
-    def search_firefox(self, query):
-        """Search using Firefox with web scraping"""
-        try:
-            # Format query for Firefox search - add "-ad -advertisement -sponsored" to exclude ads
-            search_url = f"https://news.search.yahoo.com/search?p={query}+-ad+-advertisement+-sponsored"
-            
-            # Use Firefox user agent
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-                "Cache-Control": "max-age=0"
-            }
-            
-            logger.debug(f"Searching Yahoo News with query: {query}")
-            response = requests.get(search_url, headers=headers)
-            
-            # Save HTML to file for debugging
-            with open("firefox_debug.html", "w", encoding="utf-8") as f:
-                f.write(response.text)
-            
-            if response.status_code != 200:
-                logger.error(f"Yahoo News search error: Status code {response.status_code}")
-                return []
-            
-            # Parse the HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract news articles
-            articles = []
-            
-            # Find news article containers
-            news_items = soup.select('div.NewsArticle')
-            
-            if not news_items:
-                # Try alternative selectors if the primary one doesn't work
-                news_items = soup.select('li.js-stream-content')
-            
-            if not news_items:
-                # Another fallback
-                news_items = soup.select('div.algo.news')
-            
-            logger.debug(f"Found {len(news_items)} news items")
-            
-            for i, item in enumerate(news_items[:10]):  # Limit to 10 results
-                try:
-                    # Extract title and link
-                    title_elem = item.select_one('h4') or item.select_one('h3') or item.select_one('.title')
-                    link_elem = item.select_one('a')
-                    
-                    if not title_elem or not link_elem:
-                        continue
-                    
-                    title = title_elem.text.strip()
-                    link = link_elem.get('href', '')
-                    
-                    # Extract source and time
-                    source_elem = item.select_one('.s-source') or item.select_one('.provider')
-                    time_elem = item.select_one('.s-time') or item.select_one('.datetime')
-                    
-                    source = source_elem.text.strip() if source_elem else "Unknown Source"
-                    time = time_elem.text.strip() if time_elem else ""
-                    
-                    # Extract snippet
-                    snippet_elem = item.select_one('.s-desc') or item.select_one('.abstract')
-                    snippet = snippet_elem.text.strip() if snippet_elem else ""
-                    
-                    # Calculate rating (1-5)
-                    rating = 3  # Default rating
-                    if len(snippet) > 150:
-                        rating += 1
-                    if title.lower().find(query.lower()) >= 0:
-                        rating += 1
-                    rating = min(5, max(1, rating))
-                    
-                    articles.append({
-                        'title': title,
-                        'link': link,
-                        'source': source,
-                        'time': time,
-                        'snippet': snippet,
-                        'rating': rating,
-                        'image': "",
-                        'political_bias': self.determine_political_bias(source, snippet)
-                    })
-                    
-                    logger.debug(f"Extracted article: {title}")
-                    
-                except Exception as e:
-                    logger.error(f"Error extracting article {i}: {e}")
-            
-            # If Yahoo News didn't work, try Bing News as fallback
-            if not articles:
-                logger.debug("Yahoo News extraction failed, trying Bing News")
-                articles = self.search_bing_news(query)
-            
-            return articles
-            
-        except Exception as e:
-            logger.error(f"Firefox search error: {e}")
-            logger.error(traceback.format_exc())
-            return []
-    
-    def search_bing_news(self, query):
-        """Search using Bing News as a fallback for Firefox option"""
-        try:
-            # Add exclusions for ads
-            search_url = f"https://www.bing.com/news/search?q={query}+-advertisement+-sponsored+-promotion"
-            
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
-            }
-            
-            response = requests.get(search_url, headers=headers)
-            
-            if response.status_code != 200:
-                return []
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            articles = []
-            news_items = soup.select('.news-card')
-            
-            for item in news_items[:10]:
-                try:
-                    title_elem = item.select_one('a.title')
-                    if not title_elem:
-                        continue
-                        
-                    title = title_elem.text.strip()
-                    link = title_elem.get('href', '')
-                    
-                    source_elem = item.select_one('.source')
-                    time_elem = item.select_one('.time')
-                    
-                    source = source_elem.text.strip() if source_elem else "Unknown Source"
-                    time = time_elem.text.strip() if time_elem else ""
-                    
-                    snippet_elem = item.select_one('.snippet')
-                    snippet = snippet_elem.text.strip() if snippet_elem else ""
-                    
-                    articles.append({
-                        'title': title,
-                        'link': link,
-                        'source': source,
-                        'time': time,
-                        'snippet': snippet,
-                        'rating': 3,
-                        'image': "",
-                        'political_bias': self.determine_political_bias(source, snippet)
-                    })
-                    
-                except Exception:
-                    continue
-            
-            return articles
-            
-        except Exception:
-            return []
-    
-    def calculate_rating(self, article):
-        """Calculate a relevance rating for an article (1-5 stars)"""
-        rating = 3  # Default rating
+        status = f"Found {len(result.articles)} news articles about {result.query} • {self.engine.response_cache.stats_text()}"
+        if result.timed_out_providers:
+            status += f" • Timed out: {', '.join(result.timed_out_providers)}"
+        extraction_stats = self.engine.extraction_stats_text()
+        if extraction_stats:
+            status += f" • {extraction_stats}"
+        worker_stats = self.engine.worker_pool.stats_text()
+        if worker_stats:
+            status += f" • {worker_stats}"
+        stage_times = self.search_trace.text() if self.search_trace else ""
+        if stage_times:
+            status += f" • {stage_times}"
+        self.status_var.set(status)
+
+    def receive_results(self, result, generation):
+        """Render the ranked headlines; key points are patched in as enhancement completes"""
+        if generation != self.search_generation:
+            return
         
-        # Adjust based on content length
-        if article.get("description"):
-            desc_len = len(article["description"])
-            if desc_len > 200:
-                rating += 1
-            elif desc_len < 50:
-                rating -= 1
+        # Update usage display
+        self.update_usage_display()
         
-        # Adjust based on source
-        if article.get("source", {}).get("name") in ["BBC News", "CNN", "The New York Times", "Reuters", "Associated Press"]:
-            rating += 1
+        if not result.articles:
+            self.update_results(f"No news found for '{result.query}'. Try a different search term or API source.")
+            return
         
-        # Ensure rating is between 1-5
-        return max(1, min(5, rating))
+        # Update status to show we're enhancing articles
+        status_msg = f"Found {len(result.articles)} articles"
+        if result.filtered_count > 0:
+            status_msg += f" (filtered {result.filtered_count} ads)"
+        if result.timed_out_providers:
+            status_msg += f" ({', '.join(result.timed_out_providers)} timed out)"
+        status_msg += ", enhancing summaries..."
+        self.status_var.set(status_msg)
         
-# Define emotional language indicators
-LEFT_LEANING_TERMS = [
-    "progressive", "liberal", "equality", "reform", "social justice", "climate crisis", 
-    "systemic", "marginalized", "diversity", "inclusive", "privilege", "rights", 
-    "undocumented", "gun control", "universal healthcare", "green new deal"
-]
-
-RIGHT_LEANING_TERMS = [
-    "conservative", "traditional", "freedom", "patriot", "taxpayer", "illegal alien", 
-    "border security", "law and order", "family values", "religious liberty", 
-    "second amendment", "pro-life", "socialism", "radical", "woke", "cancel culture"
-]
-
-# Ad detection patterns
-AD_INDICATORS = [
-    "sponsored", "advertisement", "promoted", "buy now", "limited time offer", 
-    "discount", "sale", "% off", "click here", "shop now", "subscribe now",
-    "special offer", "promotion", "deal", "best price", "free shipping"
-]
-
-def create_mock_results(self, query, message=None):
-    """Create mock results when API is not available"""
-    mock_message = message or "API key required. This is mock data."
+        self.show_results(result, generation)
+    
+    def show_error(self, error, generation):
+        """Report a failed search, unless a newer search has started since"""
+        if generation != self.search_generation:
+            return
+        self.update_results(f"Error searching: {error}\n\n" +
+                            "See console for detailed error information.")
     
-    return [
-        {
-            'title': f"Latest updates on {query}",
-            'link': f"https://news.google.com/search?q={query}",
-            'source': "News Source",
-            'time': "Today",
-            'snippet': f"{mock_message} Click to search for '{query}' on Google News.",
-            'rating': 3,
-            'image': "",
-            'political_bias': "Not applicable"
-        },
-        {
-            'title': f"How to get real news data for {query}",
-            'link': "https://newsapi.org/register",
-            'source': "NewsAPI.org",
-            'time': "",
-            'snippet': "Register for a free NewsAPI.org account to get real news data. The free tier allows 100 requests per day.",
-            'rating': 4,
-            'image': "",
-            'political_bias': "Not applicable"
-        }
-    ]
+def report_first_frame(event):
+    """Record the first paint of the search window and report startup timing"""
+    event.widget.unbind("<Expose>")
+    startup_timer.mark("first_frame")
+    startup_timer.report()
 
-if __name__ == "__main__":
+def main():
+    """Start the GUI
+    
+    Spawned worker processes re-import this module as __mp_main__, so
+    logging setup and startup timing live here rather than at module level.
+    """
+    startup_timer.mark("imports")
+    
+    # Set up logging
+    logging.basicConfig(level=logging.DEBUG, 
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler()])
+    
     try:
         root = tk.Tk()
+        startup_timer.mark("tk_root")
         app = NewsSearchApp(root)
+        startup_timer.mark("window_built")
+        app.main_frame.bind("<Expose>", report_first_frame)
         root.mainloop()
     except Exception as e:
         print(f"Error starting application: {e}")
         import traceback
         traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
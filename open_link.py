@@ -1,9 +1,10 @@
 def open_link(event):
     """Open the clicked link in the default web browser"""
     import webbrowser
-    # Find which link was clicked
-    for start, end, url in event.widget.master.links:
-        if event.widget.compare(start, "<=", f"@{event.x},{event.y}") and \
-            event.widget.compare(end, ">=", f"@{event.x},{event.y}"):
+    # Find which link was clicked from the unique tag on the text under the cursor
+    widget = event.widget
+    for tag in widget.tag_names(f"@{event.x},{event.y}"):
+        url = widget.link_urls.get(tag)
+        if url:
             webbrowser.open(url)
-            break
\ No newline at end of file
+            break
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import cancellation
+from cancellation import SearchCancelled
+
+logger = logging.getLogger(__name__)
+
+# Default per-provider limits as (requests per second, burst size)
+PROVIDER_RATE_LIMITS = {
+    "newsapi": (1.0, 3),
+    "gnews": (1.0, 3),
+    "firefox": (0.5, 2)
+}
+PROVIDER_QUEUE_LIMIT = 8  # Callers allowed to wait for a token per provider before new ones are rejected
+
+
+class ProviderBusy(Exception):
+    """Raised when a provider's request queue is full or its wait would exceed the deadline"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out future slots in arrival order
+
+    A caller that finds no token reserves the next one (the balance goes
+    negative) and sleeps until it is due, so waiting callers are released
+    at the bucket's rate instead of all retrying at once.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """Take a token, returning the seconds to wait before using it, or None if that exceeds max_wait"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def refund(self):
+        """Give back a reserved token that was never used"""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class ProviderScheduler:
+    """Coalesce identical in-flight provider calls and rate limit the upstream requests
+
+    coalesce() lets concurrent callers asking for the same key share a
+    single call and its result. throttle() is called right before an
+    upstream request and blocks until the provider's token bucket allows
+    it, raising ProviderBusy when too many callers are already waiting.
+    """
+
+    def __init__(self, rate_limits=None, queue_limit=PROVIDER_QUEUE_LIMIT):
+        self.buckets = {name: TokenBucket(rate, burst)
+                        for name, (rate, burst) in (rate_limits or PROVIDER_RATE_LIMITS).items()}
+        self.queue_limit = queue_limit
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.waiting = {name: 0 for name in self.buckets}
+        self.stats = {"calls": 0, "coalesced": 0, "upstream": 0, "rejected": 0, "cancelled": 0}
+
+    def coalesce(self, key, call):
+        """Run call() once for all concurrent callers with the same key and share its outcome"""
+        with self.lock:
+            self.stats["calls"] += 1
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.inflight[key] = future
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            logger.debug(f"Joining in-flight request for {key}")
+            return future.result()
+
+        try:
+            result = call()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key):
+        # Unregister before resolving, so a caller arriving now makes a fresh
+        # request instead of joining one that already finished
+        with self.lock:
+            self.inflight.pop(key, None)
+
+    def throttle(self, provider, max_wait=None):
+        """Wait for the provider's rate limit to allow one upstream request
+
+        Raises SearchCancelled if the calling search is cancelled before or
+        while waiting.
+        """
+        cancellation.check_cancelled()
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return
+
+        with self.lock:
+            if self.waiting[provider] >= self.queue_limit:
+                self.stats["rejected"] += 1
+                raise ProviderBusy(f"Too many queued requests for {provider}")
+            wait = bucket.reserve(max_wait)
+            if wait is None:
+                self.stats["rejected"] += 1
+                raise ProviderBusy(f"Rate limit for {provider} can't be met within {max_wait}s")
+            self.waiting[provider] += 1
+
+        try:
+            if wait:
+                logger.debug(f"Rate limiting {provider} for {wait:.2f}s")
+                # A superseded search gives up its slot instead of sleeping through it
+                cancellation.sleep(wait)
+        except SearchCancelled:
+            bucket.refund()
+            with self.lock:
+                self.stats["cancelled"] += 1
+            raise
+        else:
+            with self.lock:
+                self.stats["upstream"] += 1
+        finally:
+            with self.lock:
+                self.waiting[provider] -= 1
+
+    def stats_text(self):
+        """Short call/coalesced/upstream summary for logs and the status bar"""
+        with self.lock:
+            stats = dict(self.stats)
+        return (f"Provider calls: {stats['calls']} ({stats['coalesced']} shared, "
+                f"{stats['upstream']} upstream, {stats['rejected']} rejected, {stats['cancelled']} cancelled)")
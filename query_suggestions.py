@@ -0,0 +1,117 @@
+import bisect
+import heapq
+import logging
+import re
+import threading
+
+from response_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Suggestion settings
+SUGGESTION_LIMIT = 8  # Suggestions offered per keystroke
+SUGGESTION_MIN_PREFIX = 2  # Characters typed before anything is suggested
+SUGGESTION_MAX_ENTRIES = 50000  # Phrases kept before the least used are pruned
+SUGGESTION_MAX_LENGTH = 80  # Longer titles are not offered as suggestions
+SUGGESTION_HISTORY = 500  # Past queries loaded from the article store at startup
+SUGGESTION_ARTICLES = 5000  # Recent articles whose titles and entities are loaded at startup
+
+# How much each sighting adds to a phrase's weight
+QUERY_WEIGHT = 5.0  # A past search that found results
+ENTITY_WEIGHT = 1.0  # A name mentioned in a title or snippet
+TITLE_WEIGHT = 0.5  # A whole article title
+
+# Runs of one to three capitalized words (or acronyms) such as "Supreme Court" or "NASA"
+ENTITY_PATTERN = re.compile(r"\b[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*){0,2}\b")
+ENTITY_STOPWORDS = {"The", "A", "An", "In", "On", "At", "For", "And", "But", "Or", "Of", "To",
+                    "This", "That", "It", "He", "She", "They", "We", "I", "As", "After", "How", "Why", "What"}
+
+
+def extract_entities(text):
+    """Capitalized names in a title or snippet, skipping title-case headlines where every word is capitalized"""
+    words = text.split()
+    if not words or sum(word[:1].isupper() for word in words) > 0.6 * len(words):
+        return []
+    entities = []
+    for match in ENTITY_PATTERN.finditer(text):
+        entity = match.group()
+        if match.start() == 0 and " " not in entity:
+            continue  # Only capitalized because it starts the sentence
+        if entity.split()[0] in ENTITY_STOPWORDS:
+            entity = entity.partition(" ")[2]
+        if len(entity) > 2 and entity not in entities:
+            entities.append(entity)
+    return entities
+
+
+class SuggestionIndex:
+    """In-memory prefix index of past queries, article titles and the names in them
+
+    Phrases are kept lowercase in one sorted list, so the phrases starting
+    with a prefix are a contiguous slice found with two binary searches;
+    the best few of that slice by weight are the suggestions. New phrases
+    are inserted in place, and a phrase seen again only gains weight.
+    """
+
+    def __init__(self, max_entries=SUGGESTION_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.keys = []
+        self.weights = {}
+        self.display = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, phrase, weight):
+        """Add a phrase or add weight to it if already known"""
+        key = normalize_query(phrase)
+        if len(key) < SUGGESTION_MIN_PREFIX or len(key) > SUGGESTION_MAX_LENGTH:
+            return
+        with self.lock:
+            if key in self.weights:
+                self.weights[key] += weight
+                return
+            bisect.insort(self.keys, key)
+            self.weights[key] = weight
+            self.display[key] = " ".join(phrase.split())
+            if len(self.keys) > self.max_entries:
+                self._prune()
+
+    def add_query(self, query, count=1):
+        self.add(query, QUERY_WEIGHT * count)
+
+    def add_articles(self, articles):
+        """Add the titles of articles and the names in their titles and snippets"""
+        for article in articles:
+            title = article.get('title') or ""
+            self.add(title, TITLE_WEIGHT)
+            for entity in extract_entities(title) + extract_entities(article.get('snippet') or ""):
+                self.add(entity, ENTITY_WEIGHT)
+
+    def load(self, article_store):
+        """Seed the index from the queries and articles in the article store"""
+        for query, count in article_store.recent_queries(SUGGESTION_HISTORY):
+            self.add_query(query, count)
+        self.add_articles(article_store.recent_articles(SUGGESTION_ARTICLES))
+        self.loaded = True
+        logger.debug(f"Loaded {len(self.keys)} suggestion phrases")
+
+    def suggest(self, prefix, limit=SUGGESTION_LIMIT):
+        """The best known phrases starting with prefix, most used first"""
+        key = normalize_query(prefix)
+        if len(key) < SUGGESTION_MIN_PREFIX:
+            return []
+        with self.lock:
+            start = bisect.bisect_left(self.keys, key)
+            end = bisect.bisect_left(self.keys, key[:-1] + chr(ord(key[-1]) + 1), start)
+            best = heapq.nlargest(limit, self.keys[start:end], key=self.weights.__getitem__)
+            return [self.display[phrase] for phrase in best if phrase != key]
+
+    def _prune(self):
+        # Keep the most used 80% of the entries
+        keep = set(heapq.nlargest(int(self.max_entries * 0.8), self.weights, key=self.weights.__getitem__))
+        self.keys = [key for key in self.keys if key in keep]
+        self.weights = {key: self.weights[key] for key in self.keys}
+        self.display = {key: self.display[key] for key in self.keys}
@@ -0,0 +1,155 @@
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+
+# BM25F parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Fields scored and their weights
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "snippet": 1.0,
+    "enhanced_content": 1.0
+}
+
+# Recency term: the bonus halves every RECENCY_HALF_LIFE hours
+RECENCY_WEIGHT = 0.2  # Share of the top relevance score a brand-new article gains
+RECENCY_HALF_LIFE = 24.0
+
+# Query words that carry no meaning on their own
+QUERY_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "was", "were", "will", "with", "news"
+}
+
+RELATIVE_TIME_PATTERN = re.compile(
+    r"(\d+)\s*(m|min|mins|minute|minutes|h|hr|hrs|hour|hours|d|day|days|w|wk|week|weeks)\b(?:\s+ago)?",
+    re.IGNORECASE)
+RELATIVE_TIME_HOURS = {"m": 1 / 60, "h": 1, "d": 24, "w": 24 * 7}
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def query_terms(query):
+    """Distinct lowercase query words, without stopwords"""
+    terms = []
+    for word in re.findall(r"\w+", query.lower()):
+        if word not in QUERY_STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def article_age_hours(article, now=None):
+    """Age of an article in hours from its published timestamp or display time, or None if unknown"""
+    now = now or time.time()
+    if article.get("published"):
+        return max(0.0, (now - article["published"]) / 3600)
+
+    text = (article.get("time") or "").strip()
+    if not text:
+        return None
+    if text.lower() in ("today", "just now"):
+        return 0.0
+    match = RELATIVE_TIME_PATTERN.search(text)
+    if match:
+        return int(match.group(1)) * RELATIVE_TIME_HOURS[match.group(2)[0].lower()]
+    try:
+        published = datetime.strptime(text, "%b %d, %Y").timestamp()
+        return max(0.0, (now - published) / 3600)
+    except ValueError:
+        return None
+
+
+class RelevanceScorer:
+    """Batch BM25F scoring of a result set against the query
+
+    Every field of every article is scanned once with a single regex for
+    the query terms, and the BM25F sums run as NumPy array operations over
+    the whole result set. Document frequencies come from the result set
+    itself.
+    """
+
+    def __init__(self, field_weights=None, k1=BM25_K1, b=BM25_B,
+                 recency_weight=RECENCY_WEIGHT, half_life=RECENCY_HALF_LIFE):
+        self.field_weights = field_weights or FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self.recency_weight = recency_weight
+        self.half_life = half_life
+
+    def term_frequencies(self, terms, texts):
+        """Count whole-word query term hits per document, plus each document's length in characters"""
+        texts = [text.lower() for text in texts]
+        lengths = np.array([len(text) for text in texts], dtype=np.float64)
+        tf = np.zeros((len(texts), len(terms)))
+        joined = "\n".join(texts)
+        starts = np.cumsum(lengths + 1) - (lengths + 1)
+
+        # str.find jumps straight to candidates; only those are checked for word boundaries
+        positions = []
+        term_ids = []
+        for term_id, term in enumerate(terms):
+            start = joined.find(term)
+            while start != -1:
+                end = start + len(term)
+                if start == 0 or not _is_word_char(joined[start - 1]):
+                    # Tolerate a plural ending
+                    for suffix in ("", "s", "es"):
+                        if joined.startswith(suffix, end) and not _is_word_char(joined[end + len(suffix):end + len(suffix) + 1]):
+                            positions.append(start)
+                            term_ids.append(term_id)
+                            break
+                start = joined.find(term, end)
+
+        if positions:
+            docs = np.searchsorted(starts, positions, side="right") - 1
+            np.add.at(tf, (docs, term_ids), 1)
+        return tf, lengths
+
+    def ages(self, articles, now=None):
+        """Article ages in hours (NaN when unknown), parsing display times only when there's no timestamp"""
+        now = now or time.time()
+        published = np.array([article.get("published") or np.nan for article in articles], dtype=np.float64)
+        ages = np.maximum(0.0, (now - published) / 3600)
+        for i in np.flatnonzero(np.isnan(published)):
+            age = article_age_hours(articles[i], now)
+            if age is not None:
+                ages[i] = age
+        return ages
+
+    def score(self, query, articles, now=None):
+        """Return an array with one relevance score per article (higher is better)"""
+        scores = np.zeros(len(articles))
+        terms = query_terms(query)
+        if not articles or not terms:
+            return scores
+
+        weighted_tf = np.zeros((len(articles), len(terms)))
+        for field, weight in self.field_weights.items():
+            tf, lengths = self.term_frequencies(terms, [article.get(field) or "" for article in articles])
+            average = lengths.mean() or 1.0
+            weighted_tf += weight * tf / (1 - self.b + self.b * (lengths / average))[:, None]
+
+        doc_freq = np.count_nonzero(weighted_tf, axis=0)
+        idf = np.log(1 + (len(articles) - doc_freq + 0.5) / (doc_freq + 0.5))
+        scores = (idf * weighted_tf / (self.k1 + weighted_tf)).sum(axis=1)
+
+        if self.recency_weight and scores.max() > 0:
+            decay = np.power(0.5, self.ages(articles, now) / self.half_life)
+            decay[np.isnan(decay)] = 0.0
+            # Only matching articles get the bonus, so fresh but unrelated ones stay at the bottom
+            scores = scores + self.recency_weight * scores.max() * decay * (scores > 0)
+        return scores
+
+
+def stars_from_scores(scores):
+    """Map relevance scores to 1-5 stars relative to the best match"""
+    top = scores.max() if len(scores) else 0
+    if top <= 0:
+        return np.full(len(scores), 3, dtype=int)
+    return (1 + np.rint(4 * scores / top)).astype(int)
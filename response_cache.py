@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from atomic_write import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Default cache settings
+RESPONSE_CACHE_DIR = os.path.join("cache", "responses")
+RESPONSE_CACHE_TTL = 15 * 60  # Seconds a cached provider response stays fresh
+RESPONSE_CACHE_MAX_ENTRIES = 500  # Entries kept on disk before LRU eviction
+RESPONSE_CACHE_MEMORY_ENTRIES = 64  # Entries kept in the in-memory front tier
+
+
+def normalize_query(query):
+    """Normalize a search query so trivially different spellings share a cache entry"""
+    return " ".join(query.lower().split())
+
+
+class ResponseCache:
+    """Two-tier (memory + disk) cache for provider responses with TTL and LRU eviction"""
+
+    def __init__(self, cache_dir=RESPONSE_CACHE_DIR, ttl=RESPONSE_CACHE_TTL,
+                 max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 memory_entries=RESPONSE_CACHE_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.disk_count = len([name for name in os.listdir(self.cache_dir) if name.endswith(".json")])
+        except OSError as e:
+            logger.error(f"Failed to open response cache directory: {e}")
+            self.disk_count = 0
+
+    @staticmethod
+    def make_key(provider, query, page=1):
+        """Build the cache key for a provider, query and result page"""
+        key = f"{provider}:{normalize_query(query)}"
+        return key if page == 1 else f"{key}:page{page}"
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        now = time.time()
+        with self.lock:
+            entry = self._load(key)
+            if entry is None or now - entry["stored_at"] > self.ttl:
+                self.misses += 1
+                return None
+
+            self.memory.move_to_end(key)
+            self._touch_disk(key)
+            self.hits += 1
+            return entry["value"]
+
+    def get_stale(self, key):
+        """Return the cached value for key even if it has expired, or None if missing
+
+        Used to revalidate an expired entry instead of fetching it from scratch.
+        Does not count towards the hit/miss statistics.
+        """
+        with self.lock:
+            entry = self._load(key)
+            return entry["value"] if entry is not None else None
+
+    def put(self, key, value):
+        """Store value under key in both tiers"""
+        entry = {"key": key, "stored_at": time.time(), "value": value}
+        with self.lock:
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+
+    def stats_text(self):
+        """Short hit/miss summary for the status bar"""
+        return f"Cache: {self.hits} hits / {self.misses} misses"
+
+    def _load(self, key):
+        """Find an entry in the memory tier, falling back to disk"""
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        """Add an entry to the memory tier, evicting the least recently used"""
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry if entry.get("key") == key else None
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read cache entry: {e}")
+            return None
+
+    def _touch_disk(self, key):
+        """Mark a disk entry as recently used (file mtime drives LRU eviction)"""
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _write_disk(self, key, entry):
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        try:
+            atomic_write(path, lambda f: json.dump(entry, f))
+        except OSError as e:
+            logger.error(f"Failed to write cache entry: {e}")
+            return
+
+        if is_new:
+            self.disk_count += 1
+            if self.disk_count > self.max_entries:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete the least recently used disk entries until under the size bound"""
+        try:
+            paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                     if name.endswith(".json")]
+            paths.sort(key=os.path.getmtime)
+        except OSError as e:
+            logger.error(f"Failed to scan response cache: {e}")
+            return
+
+        excess = len(paths) - self.max_entries
+        for path in paths[:max(0, excess)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.disk_count = min(len(paths), self.max_entries)
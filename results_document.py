@@ -0,0 +1,138 @@
+RESULTS_PAGE_SIZE = 100  # Detailed results rendered at a time; the rest wait behind a "Show more" link
+
+
+def tk_length(text):
+    """Length of text as counted by a Tcl 8.6 text widget, where characters outside the BMP count twice"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def stars(rating):
+    return "★" * rating + "☆" * (5 - rating)
+
+
+class ResultsDocument:
+    """Rendered results as one string plus the (line, column) ranges of its tags
+
+    The whole document is built in Python, so the text widget gets a single
+    insert and one tag_add per tag instead of several calls per article.
+    Lines and columns are relative to where the document gets inserted, and
+    columns are measured with length (len, or tk_length for Tcl 8.6).
+    """
+
+    def __init__(self, length=len):
+        self.length = length
+        self.parts = []
+        self.line = 0
+        self.column = 0
+        self.tags = {}  # tag -> [start, end, start, end, ...]
+        self.marks = {}  # mark name -> position
+        self.links = {}  # link tag -> url
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def append(self, text, tags=()):
+        start = (self.line, self.column)
+        self.parts.append(text)
+        newlines = text.count("\n")
+        if newlines:
+            self.line += newlines
+            self.column = self.length(text[text.rfind("\n") + 1:])
+        else:
+            self.column += self.length(text)
+        end = (self.line, self.column)
+
+        for tag in tags:
+            ranges = self.tags.setdefault(tag, [])
+            if ranges and ranges[-1] == start:
+                # Extend the previous range instead of starting an adjacent one
+                ranges[-1] = end
+            else:
+                ranges += (start, end)
+
+    def mark(self, name):
+        """Remember the current position under name"""
+        self.marks[name] = (self.line, self.column)
+
+    def link(self, text, url, tag):
+        self.links[tag] = url
+        self.append(text, ("link", tag))
+
+
+def build_results(query, articles, summary_count, page_size=RESULTS_PAGE_SIZE, length=len):
+    """Document with the header, the quick summary and the first page of article details
+
+    Summary entry i carries the tags summary_entry{i} and summary_bias{i}
+    (on its bias) and the mark key_points{i} where its key points belong,
+    so they can be patched in once the article has been enhanced.
+    """
+    document = ResultsDocument(length)
+    document.append(f"Search Results for: {query}\n\n", ("title",))
+
+    # Display a summary first
+    document.append("QUICK SUMMARY (Sorted by Relevance):\n", ("title",))
+    document.append(f"Top stories about '{query}':\n\n", ("summary",))
+
+    for i, article in enumerate(articles[:summary_count]):
+        entry_tags = ("summary", f"summary_entry{i}")
+
+        source_info = f"{article['source']}"
+        if article['time']:
+            source_info += f" ({article['time']})"
+
+        # Bullet point with relevance rating and political bias
+        document.append(f"• {article['title']}\n  {source_info} • Relevance: {stars(article['rating'])} • Bias: ",
+                        entry_tags)
+        document.append(article.get('political_bias', 'Not applicable'), entry_tags + (f"summary_bias{i}",))
+        document.append("\n", entry_tags)
+
+        # Key points are inserted here once the article page has been fetched
+        document.mark(f"key_points{i}")
+        document.append("\n", entry_tags)
+
+    document.append("\n", ("summary",))
+    document.append("FULL ARTICLE DETAILS (Sorted by Relevance):\n\n", ("title",))
+    add_details(document, articles, 0, page_size, summary_count)
+    return document
+
+
+def build_details(articles, start, page_size, summary_count, length=len):
+    """Document with the next page of article details, starting at index start"""
+    document = ResultsDocument(length)
+    add_details(document, articles, start, page_size, summary_count)
+    return document
+
+
+def add_details(document, articles, start, page_size, summary_count):
+    """Append the details of articles[start:start + page_size], then a "Show more" link if any are left"""
+    stop = min(len(articles), start + page_size)
+    for i in range(start, stop):
+        article = articles[i]
+        document.append(f"{i+1}. {article['title']}\n", ("title",))
+
+        source_time = f"{article['source']}"
+        if article['time']:
+            source_time += f" • {article['time']}"
+        document.append(f"{source_time}\n", ("summary",))
+
+        if article['snippet']:
+            document.append(f"{article['snippet']}\n", ("summary",))
+
+        # Other outlets carrying the same story
+        if article.get('also_reported_by'):
+            document.append(f"Also reported by: {', '.join(article['also_reported_by'])}\n", ("summary",))
+
+        document.link("Read more", article['link'], f"link{i}")
+        document.append(f" • Relevance: {stars(article['rating'])} • Political Bias: ", ("rating",))
+        # Only summary articles get their bias patched after enhancement
+        bias_tags = ("rating", f"detail_bias{i}") if i < summary_count else ("rating",)
+        document.append(article.get('political_bias', 'Not applicable'), bias_tags)
+        document.append("\n\n", ("rating",))
+
+    remaining = len(articles) - stop
+    if remaining:
+        document.append(f"Show {min(page_size, remaining)} more of {remaining} remaining results",
+                        ("link", "more_results"))
+        document.append("\n", ("summary",))
+    return stop
@@ -0,0 +1,134 @@
+import asyncio
+import functools
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from cancellation import CancelToken, SearchCancelled, bind_context, current_token
+from stage_metrics import current_trace, metrics
+
+logger = logging.getLogger(__name__)
+
+SEARCH_LOOP_WORKERS = 4  # Threads running the blocking provider and enhancement stages
+SEARCH_ENHANCE_COUNT = 3  # Top articles enhanced after each search
+
+
+class SearchLoop:
+    """Run searches as tasks on one background asyncio event loop
+
+    Every search carries the caller's generation ID, and submitting a new
+    one cancels the search before it: its task is cancelled and its
+    CancelToken set. The blocking provider and enhancement calls it left in
+    the worker threads see the token at their checkpoints (before waiting
+    for a rate limit, before spending quota, before each article page and
+    between the chunks of a download) and give up, so an abandoned search
+    stops using sockets, CPU and quota. Callbacks of a cancelled search are
+    never called. A search given a SearchTrace records its stage times
+    there. With a metrics_dir, the stage metrics are exported there after
+    every completed search, on a worker thread.
+    """
+
+    def __init__(self, engine, workers=SEARCH_LOOP_WORKERS, metrics_dir=None):
+        self.engine = engine
+        self.metrics_dir = metrics_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(self.executor)
+        self.thread = threading.Thread(target=self.loop.run_forever, name="search-loop", daemon=True)
+        self.thread.start()
+        self.lock = threading.Lock()
+        self.current = None  # (generation, token, future) of the latest search
+
+    def submit(self, generation, query, provider="newsapi", deep=False, enhance_count=SEARCH_ENHANCE_COUNT,
+               on_update=None, on_results=None, on_enhanced=None, on_done=None, on_error=None, trace=None):
+        """Start a search, cancelling the previous one, and return a future for its SearchResult
+
+        Callbacks: on_update(partial_result) after each page of a deep
+        search, on_results(result) once the ranked results are in,
+        on_enhanced(index, article) as each of the top enhance_count
+        articles is enhanced, on_done(result) at the end and
+        on_error(exception) if the search fails. on_results, on_done and
+        on_error run on the event loop thread; on_update and on_enhanced
+        run on the executor thread of the engine call reporting them. None
+        of them run on the caller's thread, so a GUI must hand them over
+        (e.g. with root.after). trace, if given, collects
+        the time each stage took.
+        """
+        token = CancelToken()
+        callbacks = {name: self.guard(token, callback) for name, callback in (
+            ("on_update", on_update), ("on_results", on_results), ("on_enhanced", on_enhanced),
+            ("on_done", on_done), ("on_error", on_error))}
+        coroutine = self.run(generation, token, trace, query, provider, deep, enhance_count, **callbacks)
+
+        with self.lock:
+            # Cancel first, so the old search's rate limit slots are free for this one
+            if self.current:
+                self.abandon(*self.current)
+            future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+            self.current = (generation, token, future)
+        return future
+
+    def cancel(self):
+        """Cancel the current search, if any"""
+        with self.lock:
+            previous, self.current = self.current, None
+        if previous:
+            self.abandon(*previous)
+
+    def abandon(self, generation, token, future):
+        if not future.done():
+            logger.debug(f"Cancelling search generation {generation}")
+        token.cancel()
+        future.cancel()
+
+    def guard(self, token, callback):
+        """Wrap a callback so it is skipped once the search is cancelled"""
+        if callback is None:
+            return None
+
+        def guarded(*args):
+            if not token.cancelled:
+                callback(*args)
+        return guarded
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        """Run a blocking engine call on a worker thread that sees this task's token"""
+        call = functools.partial(bind_context(fn), *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+
+    async def run(self, generation, token, trace, query, provider, deep, enhance_count,
+                  on_update, on_results, on_enhanced, on_done, on_error):
+        """One search: provider stage, then enhancement of the top articles"""
+        # Each task runs in its own context, so the token only reaches this search's work
+        current_token.set(token)
+        current_trace.set(trace)
+        try:
+            if deep:
+                result = await self.run_blocking(self.engine.deep_search, query, provider, on_update=on_update)
+            else:
+                result = await self.run_blocking(self.engine.search, query, provider)
+            if on_results:
+                on_results(result)
+
+            if result.articles and enhance_count:
+                await self.run_blocking(self.engine.enhance_top_articles, result.articles[:enhance_count],
+                                        on_enhanced=on_enhanced)
+            metrics.count("searches", provider=provider, outcome="completed")
+            if on_done:
+                on_done(result)
+            if self.metrics_dir and metrics.enabled:
+                await self.run_blocking(metrics.export, self.metrics_dir)
+            return result
+        except (SearchCancelled, asyncio.CancelledError):
+            logger.debug(f"Search generation {generation} cancelled")
+            metrics.count("searches", provider=provider, outcome="cancelled")
+            token.cancel()
+            raise
+        except Exception as e:
+            metrics.count("searches", provider=provider, outcome="failed")
+            logger.error(f"Error in search generation {generation}: {e}")
+            logger.error(traceback.format_exc())
+            if on_error:
+                on_error(e)
+            raise
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import re
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Tokens too generic to identify an outlet on their own
+GENERIC_NAME_TOKENS = {
+    "the", "news", "times", "post", "daily", "journal", "magazine", "monitor",
+    "press", "review", "network", "media", "online", "world", "today", "weekly",
+    "channel", "tv", "radio", "new", "york", "washington", "street", "wall"
+}
+
+
+def normalize_name(name):
+    """Lowercase a source name and reduce it to alphanumeric tokens"""
+    return re.findall(r"[a-z0-9]+", name.lower())
+
+
+def host_name(url_or_host):
+    """Lowercase host name of a URL or host"""
+    if not url_or_host:
+        return ""
+    host = urlparse(url_or_host).hostname if "//" in url_or_host else url_or_host
+    return (host or "").lower().rstrip(".")
+
+
+def parent_hosts(host):
+    """A host and each of its parent domains, most specific first (a.b.com, b.com, com)"""
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(len(labels))]
+
+
+class SourceBiasIndex:
+    """Political bias lookup for news outlets by name, partial name and domain
+
+    Exact names and domains resolve through hash maps. A listed domain
+    covers its subdomains (cnn.com matches edition.cnn.com) but never its
+    parents, so listing abcnews.go.com says nothing about espn.go.com.
+    Partial names are matched token by token against a trie, so short
+    names like "ap" only match the whole word "ap" rather than any
+    substring.
+    """
+
+    def __init__(self, outlets):
+        self.names = {}
+        self.domains = {}
+        self.name_trie = {}
+        self.name_fragments = {}
+
+        for outlet in outlets:
+            bias = outlet["bias"]
+            for name in outlet.get("names", []):
+                tokens = normalize_name(name)
+                if not tokens:
+                    continue
+                self.names[" ".join(tokens)] = bias
+                self._add_to_trie(tokens, bias)
+                self._add_fragments(tokens, bias)
+            for domain in outlet.get("domains", []):
+                self.domains[host_name(domain)] = bias
+
+        # Fragments shared by outlets with different leanings identify nothing
+        self.name_fragments = {fragment: bias for fragment, bias in self.name_fragments.items()
+                               if bias is not None}
+
+    @classmethod
+    def from_file(cls, path, default_outlets=()):
+        """Load the index from a JSON data file, falling back to default outlets"""
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return cls(json.load(f)["outlets"])
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Failed to load source bias data from {path}: {e}")
+        return cls(default_outlets)
+
+    def _add_to_trie(self, tokens, bias):
+        node = self.name_trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[""] = bias
+
+    def _add_fragments(self, tokens, bias):
+        """Index the contiguous token runs of a name so shortened names still resolve"""
+        for start in range(len(tokens)):
+            for end in range(start + 1, len(tokens) + 1):
+                fragment = tokens[start:end]
+                if all(token in GENERIC_NAME_TOKENS for token in fragment):
+                    continue
+                key = " ".join(fragment)
+                existing = self.name_fragments.get(key, bias)
+                self.name_fragments[key] = bias if existing == bias else None
+
+    def lookup(self, source_name=None, link=None):
+        """Find the bias of an outlet
+
+        Returns a (bias, match_type) tuple where match_type is "exact",
+        "domain" or "partial", or (None, None) when the outlet is unknown.
+        """
+        tokens = normalize_name(source_name) if source_name else []
+
+        if tokens:
+            bias = self.names.get(" ".join(tokens))
+            if bias:
+                return bias, "exact"
+
+        if link:
+            # The most specific listed host wins
+            for host in parent_hosts(host_name(link)):
+                bias = self.domains.get(host)
+                if bias:
+                    return bias, "domain"
+
+        if tokens:
+            bias = self._longest_known_name(tokens) or self.name_fragments.get(" ".join(tokens))
+            if bias:
+                return bias, "partial"
+
+        return None, None
+
+    def _longest_known_name(self, tokens):
+        """Find the longest known outlet name that appears as a run of whole tokens"""
+        best_length = 0
+        best_bias = None
+        for start in range(len(tokens)):
+            node = self.name_trie
+            for offset, token in enumerate(tokens[start:]):
+                node = node.get(token)
+                if node is None:
+                    break
+                if "" in node and offset + 1 > best_length:
+                    best_length = offset + 1
+                    best_bias = node[""]
+        return best_bias
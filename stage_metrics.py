@@ -0,0 +1,305 @@
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from atomic_write import atomic_write
+from cancellation import SearchCancelled
+
+logger = logging.getLogger(__name__)
+
+# Set to "0" to turn instrumentation off in the GUI (it is on there by default)
+METRICS_ENV = "NEWS_SEARCH_METRICS"
+# Set to a directory to have the GUI write metrics.json and metrics.prom there after every search
+METRICS_DIR_ENV = "NEWS_SEARCH_METRICS_DIR"
+
+METRICS_PREFIX = "news_search"  # Prefix of the exported Prometheus metric names
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+
+# Pipeline stages in the order they are shown in per-search breakdowns
+STAGE_ORDER = ("http", "parse", "bias", "ad_filter", "score", "dedupe", "sort",
+               "enhance", "summary", "render")
+
+# Breakdown of the search the current code runs for (None outside a traced search)
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Histogram:
+    """Latency distribution in fixed buckets, as exported to Prometheus"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one counts values above every bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within the bucket it falls in"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class SearchTrace:
+    """Time each stage took during one search, for the status bar"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}  # stage -> [calls, seconds]
+
+    def add(self, stage, seconds):
+        with self.lock:
+            totals = self.stages.setdefault(stage, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def text(self):
+        """Compact breakdown such as "Stages: http 412 ms, parse 18 ms (10×), render 9 ms"
+
+        Stages nest (a parse includes the bias checks of its articles) and
+        run concurrently, so the times don't add up to the search time.
+        """
+        with self.lock:
+            stages = dict(self.stages)
+        ordered = [stage for stage in STAGE_ORDER if stage in stages]
+        ordered += sorted(stage for stage in stages if stage not in STAGE_ORDER)
+        parts = []
+        for stage in ordered:
+            calls, seconds = stages[stage]
+            part = f"{stage} {seconds * 1000:.1f} ms" if seconds < 0.01 else f"{stage} {seconds * 1000:.0f} ms"
+            if calls > 1:
+                part += f" ({calls}×)"
+            parts.append(part)
+        return f"Stages: {', '.join(parts)}" if parts else ""
+
+
+class Span:
+    """Times one run of a stage into the registry and the current search's trace"""
+
+    def __init__(self, registry, stage, labels, items, trace):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+        self.items = items
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if exc_type is SearchCancelled:
+            return False  # Abandoned work would only skew the latencies
+        self.registry.record(self.stage, self.labels, elapsed, self.items, exc_type is not None)
+        trace = self.trace or current_trace.get()
+        if trace is not None:
+            trace.add(self.stage, elapsed)
+        return False
+
+
+class NoSpan:
+    """Stand-in for Span while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NO_SPAN = NoSpan()
+
+
+class StageMetrics:
+    """Latency histograms and counters for every stage of the search pipeline
+
+    Code wraps a stage in "with metrics.span(stage, **labels):" or
+    decorates it with @metrics.timed(stage). While disabled, span() returns
+    a shared no-op context manager, so the cost is one attribute check per
+    stage (plus a function call for timed()). While enabled, every span
+    adds its latency to the histogram of its stage and labels, counts the
+    items it handled and any error, and adds its time to the current
+    SearchTrace.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.histograms = {}  # (stage, labels) -> Histogram
+        self.items = {}  # (stage, labels) -> items handled
+        self.errors = {}  # (stage, labels) -> runs that raised
+        self.counters = {}  # (name, labels) -> value
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, stage, trace=None, items=None, **labels):
+        """Context manager timing one run of stage, e.g. span("http", provider="gnews")
+
+        items is how many articles (or pages) the run handled. trace
+        defaults to the SearchTrace of the current search, if any.
+        """
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, stage, tuple(sorted(labels.items())), items, trace)
+
+    def timed(self, stage, **labels):
+        """Decorator timing every call of a function as a run of stage"""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(stage, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def trace(self):
+        """A new SearchTrace, or None while disabled"""
+        return SearchTrace() if self.enabled else None
+
+    def count(self, name, amount=1, **labels):
+        """Add amount to the counter name (exported as <prefix>_<name>_total)"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def record(self, stage, labels, seconds, items=None, failed=False):
+        key = (stage, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+            if items:
+                self.items[key] = self.items.get(key, 0) + items
+            if failed:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.histograms = {}
+            self.items = {}
+            self.errors = {}
+            self.counters = {}
+
+    def snapshot(self):
+        """Every stage's latency summary and counters as a JSON-serializable dict"""
+        with self.lock:
+            stages = []
+            for (stage, labels), histogram in sorted(self.histograms.items()):
+                stages.append({
+                    "stage": stage,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "errors": self.errors.get((stage, labels), 0),
+                    "items": self.items.get((stage, labels), 0),
+                    "total_ms": round(histogram.sum * 1000, 3),
+                    "mean_ms": round(histogram.sum / histogram.count * 1000, 3),
+                    "p50_ms": round(histogram.quantile(0.5) * 1000, 3),
+                    "p90_ms": round(histogram.quantile(0.9) * 1000, 3),
+                    "p99_ms": round(histogram.quantile(0.99) * 1000, 3),
+                    "max_ms": round(histogram.max * 1000, 3),
+                    "buckets": dict(zip(map(str, histogram.buckets + ("+Inf",)), histogram.counts))
+                })
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            return {"started": self.started, "taken": time.time(), "stages": stages, "counters": counters}
+
+    def prometheus_text(self):
+        """Every metric in the Prometheus text exposition format"""
+        seconds = f"{METRICS_PREFIX}_stage_seconds"
+        lines = [f"# HELP {seconds} Time spent in each search pipeline stage",
+                 f"# TYPE {seconds} histogram"]
+        with self.lock:
+            for (stage, labels), histogram in sorted(self.histograms.items()):
+                stage_labels = (("stage", stage),) + labels
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{seconds}_bucket{format_labels(stage_labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{seconds}_sum{format_labels(stage_labels)} {histogram.sum:.6f}")
+                lines.append(f"{seconds}_count{format_labels(stage_labels)} {histogram.count}")
+
+            for name, values, help_text in (
+                    ("stage_items", self.items, "Articles or pages handled by each stage"),
+                    ("stage_errors", self.errors, "Stage runs that raised an error")):
+                metric = f"{METRICS_PREFIX}_{name}_total"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for (stage, labels), value in sorted(values.items()):
+                    lines.append(f"{metric}{format_labels((('stage', stage),) + labels)} {value}")
+
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                metric = f"{METRICS_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{metric}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to path, in Prometheus text format if it ends in .prom and as JSON otherwise"""
+        try:
+            self._write(path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {path}: {e}")
+
+    def export(self, directory):
+        """Write metrics.json and metrics.prom to directory, only logging a warning if that fails"""
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self._write(os.path.join(directory, "metrics.json"))
+            self._write(os.path.join(directory, "metrics.prom"))
+        except OSError as e:
+            logger.warning(f"Failed to export metrics to {directory}: {e}")
+
+    def _write(self, path):
+        if path.endswith(".prom"):
+            content = self.prometheus_text()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        # Write atomically so a scraper never reads a half-written file
+        atomic_write(path, lambda f: f.write(content))
+
+
+def format_labels(labels):
+    """Prometheus label set such as {stage="http",provider="gnews"}"""
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+               for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+# The process-wide registry (disabled until something enables it)
+metrics = StageMetrics()
@@ -0,0 +1,40 @@
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Set to a file path to also write the startup report there as JSON
+STARTUP_REPORT_ENV = "NEWS_SEARCH_STARTUP_REPORT"
+
+# Imported first by the GUI entry point, so this approximates process start
+PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    """Record named milestones from process start up to the first painted frame"""
+    
+    def __init__(self):
+        self.milestones = []
+    
+    def mark(self, name):
+        """Record a milestone at the current time"""
+        self.milestones.append((name, time.perf_counter() - PROCESS_START))
+    
+    def report(self):
+        """Log the milestones and write them to the report file if one is configured"""
+        summary = ", ".join(f"{name} {elapsed * 1000:.1f}ms" for name, elapsed in self.milestones)
+        logger.info(f"Startup timing: {summary}")
+        
+        report_path = os.environ.get(STARTUP_REPORT_ENV)
+        if not report_path:
+            return
+        try:
+            with open(report_path, "w") as f:
+                json.dump({name: round(elapsed * 1000, 2) for name, elapsed in self.milestones}, f, indent=2)
+        except OSError as e:
+            logger.error(f"Failed to write startup report: {e}")
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import re
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Per-lexicon scan results: hit counts, distinct terms found and (start, end, term) positions
+TermMatches = namedtuple("TermMatches", ["counts", "terms", "positions"])
+
+
+def load_lexicons(path, defaults):
+    """Load term lexicons from a JSON config file, falling back to defaults
+
+    The file maps lexicon names to lists of terms. Lexicons missing from the
+    file keep their default terms.
+    """
+    lexicons = {name: list(terms) for name, terms in defaults.items()}
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+            for name, terms in overrides.items():
+                lexicons[name] = list(terms)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load term lexicons from {path}: {e}")
+    return lexicons
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def _trie_pattern(node, last_char=""):
+    """Turn a character trie into a regex so shared prefixes are matched once
+
+    Terms that end in a word character must also end on a word boundary.
+    """
+    alternatives = []
+    for char, child in sorted((k, v) for k, v in node.items() if k):
+        # Any run of whitespace matches a space inside a multi-word term
+        prefix = r"\s+" if char == " " else re.escape(char)
+        alternatives.append(prefix + _trie_pattern(child, char))
+
+    if "" in node:
+        # Listed last so longer terms sharing this prefix are tried first
+        alternatives.append(r"(?!\w)" if _is_word_char(last_char) else "")
+
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+class TermMatcher:
+    """Match several term lexicons against text in a single regex pass
+
+    All terms are compiled into one word-bounded pattern shaped like a trie,
+    so scanning cost depends on the text length rather than on how many
+    terms the lexicons hold.
+    """
+
+    def __init__(self, lexicons):
+        self.lexicon_names = list(lexicons)
+        self.term_lexicons = {}
+
+        trie = {}
+        for name, terms in lexicons.items():
+            for term in terms:
+                term = " ".join(term.lower().split())
+                if not term:
+                    continue
+                self.term_lexicons.setdefault(term, []).append(name)
+
+                node = trie
+                for char in term:
+                    node = node.setdefault(char, {})
+                node[""] = True
+
+        # Terms starting with a word character must also start on a word boundary
+        word_start = {k: v for k, v in trie.items() if _is_word_char(k)}
+        other_start = {k: v for k, v in trie.items() if not _is_word_char(k)}
+        alternatives = []
+        if word_start:
+            alternatives.append(r"(?<!\w)" + _trie_pattern(word_start))
+        if other_start:
+            alternatives.append(_trie_pattern(other_start))
+
+        if alternatives:
+            self.pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+        else:
+            self.pattern = None
+
+    def _lexicons_for(self, match):
+        return self.term_lexicons.get(" ".join(match.group().lower().split()), ())
+
+    def scan(self, text):
+        """Scan text once and report matches for every lexicon"""
+        counts = {name: 0 for name in self.lexicon_names}
+        terms = {name: set() for name in self.lexicon_names}
+        positions = {name: [] for name in self.lexicon_names}
+
+        if text and self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                term = " ".join(match.group().lower().split())
+                for name in self._lexicons_for(match):
+                    counts[name] += 1
+                    terms[name].add(term)
+                    positions[name].append((match.start(), match.end(), term))
+
+        return TermMatches(counts, terms, positions)
+
+    def contains(self, text, lexicon):
+        """Return True as soon as any term from the given lexicon is found"""
+        if not text or self.pattern is None:
+            return False
+        for match in self.pattern.finditer(text):
+            if lexicon in self._lexicons_for(match):
+                return True
+        return False
@@ -0,0 +1,29 @@
+import json
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(REPO_ROOT, "benchmarks", "fixtures")
+
+# The modules live at the repo root rather than in a package
+sys.path.insert(0, REPO_ROOT)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def article_html():
+    return load_fixture("article.html")
+
+
+@pytest.fixture
+def newsapi_articles():
+    """The NewsAPI fixture's articles in the engine's article dict shape"""
+    return [{"title": item["title"], "snippet": item["description"], "link": item["url"],
+             "source": item["source"]["name"]}
+            for item in json.loads(load_fixture("newsapi_response.json"))["articles"]]
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from api_usage import ApiUsageTracker, QuotaPolicy
+
+
+@pytest.fixture
+def usage_file(tmp_path):
+    return str(tmp_path / "api_usage.json")
+
+
+def tracker(usage_file, daily_limit=10, window_limit=None, window_seconds=None, lease_size=5):
+    return ApiUsageTracker(usage_file, quotas={"newsapi": QuotaPolicy(daily_limit, window_limit, window_seconds)},
+                           lease_size=lease_size)
+
+
+def test_daily_limit(usage_file):
+    usage = tracker(usage_file, daily_limit=3)
+    assert [usage.try_consume("newsapi") for _ in range(4)] == [True, True, True, False]
+    assert usage.get_usage("newsapi") == 3
+    assert usage.get_remaining("newsapi") == 0
+
+
+def test_leases_are_shared_through_the_ledger(usage_file):
+    first = tracker(usage_file, daily_limit=8, lease_size=5)
+    second = tracker(usage_file, daily_limit=8, lease_size=5)
+    assert first.try_consume("newsapi")  # Leases 5 units
+    granted = sum(second.try_consume("newsapi") for _ in range(5))
+    assert granted == 3  # Only what the first tracker's lease left over
+
+
+def test_flush_returns_unused_units(usage_file):
+    usage = tracker(usage_file, daily_limit=10, lease_size=5)
+    usage.try_consume("newsapi")
+    usage.flush()
+    with open(usage_file) as f:
+        assert json.load(f)["newsapi"]["count"] == 1
+    assert tracker(usage_file, daily_limit=10).get_remaining("newsapi") == 9
+
+
+def test_new_day_resets_the_count(usage_file):
+    usage = tracker(usage_file, daily_limit=2)
+    usage.try_consume("newsapi")
+    usage.try_consume("newsapi")
+    assert not usage.try_consume("newsapi")
+    usage.today = lambda: "2999-01-01"
+    assert usage.try_consume("newsapi")
+
+
+def test_rolling_window_limit(usage_file, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("api_usage.time.time", lambda: now[0])
+    usage = tracker(usage_file, daily_limit=100, window_limit=2, window_seconds=60, lease_size=1)
+    assert usage.try_consume("newsapi")
+    assert usage.try_consume("newsapi")
+    assert not usage.try_consume("newsapi")
+    assert usage.get_remaining("newsapi") == 0
+
+    now[0] += 61  # The first two requests leave the window
+    assert usage.get_remaining("newsapi") == 2
+    assert usage.try_consume("newsapi")
+
+
+def test_increment_usage_records_past_the_limit(usage_file):
+    usage = tracker(usage_file, daily_limit=1)
+    usage.try_consume("newsapi")
+    assert usage.increment_usage("newsapi") == 2
@@ -0,0 +1,91 @@
+from article_extractor import ArticleExtractor, extract_paragraphs, stream_paragraphs
+
+
+class FakeResponse:
+    """Streamed response serving a page in fixed-size chunks"""
+
+    def __init__(self, body, encoding="utf-8"):
+        self.body = body.encode(encoding)
+        self.encoding = encoding
+        self.chunks_read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            self.chunks_read += 1
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_fixture_lead_paragraphs(article_html):
+    paragraphs = extract_paragraphs(article_html, max_paragraphs=3)
+    assert len(paragraphs) == 3
+    assert paragraphs[0].startswith("Lawmakers approved the sweeping climate package")
+    assert "governor's desk" in paragraphs[0]  # Character references are decoded
+
+
+def test_same_result_for_any_chunk_size(article_html):
+    expected = extract_paragraphs(article_html, chunk_size=len(article_html))
+    for chunk_size in (1, 7, 512):
+        assert extract_paragraphs(article_html, chunk_size=chunk_size) == expected
+
+
+def test_article_wins_over_earlier_content_div():
+    html = ('<div class="content">' + "".join(f"<p>teaser {i}</p>" for i in range(6)) + "</div>"
+            "<article><p>first</p><p>second</p></article>")
+    assert extract_paragraphs(html, chunk_size=16) == ["first", "second"]
+
+
+def test_content_div_used_without_article():
+    html = '<div class="story-content"><div><p>one</p></div><p>two</p></div><p>footer</p>'
+    assert extract_paragraphs(html) == ["one", "two"]
+
+
+def test_skipped_tags_and_nested_article_elements():
+    html = "<article><p>text<script>var x = 1;</script> here</p><section><p>nested</p></section></article>"
+    assert extract_paragraphs(html) == ["text here", "nested"]
+
+
+def test_no_container_gives_nothing():
+    assert extract_paragraphs("<p>loose paragraph</p>") == []
+
+
+def test_done_once_article_has_enough_paragraphs():
+    extractor = ArticleExtractor(max_paragraphs=2)
+    extractor.feed("<article><p>a</p>")
+    assert not extractor.done
+    extractor.feed("<p>b</p><p>c")
+    assert extractor.done
+    assert extractor.paragraphs == ["a", "b"]
+
+
+def test_stream_stops_after_lead_paragraphs(article_html):
+    response = FakeResponse(article_html)
+    result = stream_paragraphs(response, max_bytes=1 << 20, max_paragraphs=2, chunk_size=1024)
+    assert len(result.paragraphs) == 2
+    assert result.bytes_downloaded < len(response.body)
+    assert not result.truncated
+    assert response.closed
+
+
+def test_stream_truncates_at_max_bytes(article_html):
+    response = FakeResponse(article_html)
+    result = stream_paragraphs(response, max_bytes=1024, chunk_size=512)
+    assert result.truncated
+    assert result.bytes_downloaded == 1024
+    assert response.closed
+
+
+def test_stream_stops_when_cancelled(article_html):
+    response = FakeResponse(article_html)
+    result = stream_paragraphs(response, max_bytes=1 << 20, chunk_size=256, cancelled=lambda: True)
+    assert result.truncated
+    assert response.chunks_read == 1
+
+
+def test_stream_decodes_multibyte_characters_split_across_chunks():
+    html = "<article><p>café “quoted”</p></article>"
+    result = stream_paragraphs(FakeResponse(html), max_bytes=1 << 20, chunk_size=3)
+    assert result.paragraphs == ["café “quoted”"]
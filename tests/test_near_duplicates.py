@@ -0,0 +1,70 @@
+import near_duplicates
+from near_duplicates import duplicate_groups, features, is_near_duplicate
+
+
+def syndicated_copy(article, source):
+    """The same story as another outlet runs it, with a truncated snippet"""
+    snippet = article["snippet"]
+    return dict(article, snippet=snippet[:len(snippet) * 3 // 4] + "...", source=source,
+                link=f"https://{source.lower()}.example.com/story")
+
+
+def test_features_ignore_case_punctuation_and_short_words():
+    assert features("The Fed HOLDS rates", "at 5% -- for now") == {"the", "fed", "holds", "rates", "for", "now"}
+    assert features("", None) == frozenset()
+
+
+def test_minhash_is_deterministic():
+    feature_set = features("Senate passes climate bill")
+    assert near_duplicates.minhash(feature_set) == near_duplicates.minhash(set(feature_set))
+    assert len(near_duplicates.minhash(feature_set)) == near_duplicates.MINHASH_LANES
+    assert near_duplicates.minhash(frozenset()) is None
+
+
+def test_small_sets_only_match_when_identical():
+    assert is_near_duplicate(features("Fed holds"), features("Fed holds"))
+    assert not is_near_duplicate(features("Fed holds"), features("Fed cuts"))
+
+
+def test_fixture_stories_are_distinct(newsapi_articles):
+    feature_sets = [features(a["title"], a["snippet"]) for a in newsapi_articles]
+    assert duplicate_groups(feature_sets) == [[i] for i in range(len(newsapi_articles))]
+
+
+def test_syndicated_copies_are_grouped(newsapi_articles):
+    articles = list(newsapi_articles)
+    articles.append(syndicated_copy(newsapi_articles[0], "AP"))
+    articles.append(syndicated_copy(newsapi_articles[2], "CNBC"))
+    articles.append(syndicated_copy(newsapi_articles[0], "NPR"))
+    feature_sets = [features(a["title"], a["snippet"]) for a in articles]
+
+    groups = duplicate_groups(feature_sets)
+    count = len(newsapi_articles)
+    assert [0, count, count + 2] in groups
+    assert [2, count + 1] in groups
+    assert len(groups) == count
+
+
+def test_exact_keys_group_items_with_different_words():
+    feature_sets = [features("Senate passes climate bill"), features("Lawmakers approve energy package"),
+                    features("Unrelated sports story")]
+    exact_keys = [("https://example.com/a",), ("https://example.com/a",), ("",)]
+    assert duplicate_groups(feature_sets, exact_keys) == [[0, 1], [2]]
+
+
+def test_empty_feature_sets_stay_alone():
+    assert duplicate_groups([frozenset(), frozenset()]) == [[0], [1]]
+
+
+def test_engine_keeps_the_fullest_copy(newsapi_articles, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The engine's caches default to ./cache
+    from news_engine import NewsEngine
+
+    original = newsapi_articles[0]
+    articles = [syndicated_copy(original, "AP"), original, syndicated_copy(original, "NPR")] + newsapi_articles[1:]
+    unique_articles = NewsEngine().collapse_duplicates(articles)
+
+    assert len(unique_articles) == len(newsapi_articles)
+    assert unique_articles[0] is original
+    assert original["also_reported_by"] == ["AP", "NPR"]
+    assert "also_reported_by" not in unique_articles[1]
@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import cancellation
+from cancellation import CancelToken, SearchCancelled
+from provider_scheduler import ProviderBusy, ProviderScheduler
+
+
+def test_concurrent_callers_share_one_call():
+    scheduler = ProviderScheduler()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["article"]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(scheduler.coalesce, "key", call)
+        assert started.wait(5)
+        followers = [executor.submit(scheduler.coalesce, "key", call) for _ in range(3)]
+        while scheduler.stats["coalesced"] < 3:  # Wait until every follower has joined
+            time.sleep(0.01)
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert calls == [1]
+    assert results == [["article"]] * 4
+    assert scheduler.stats["calls"] == 4
+    assert scheduler.inflight == {}
+
+
+def test_caller_after_resolve_makes_a_fresh_call():
+    scheduler = ProviderScheduler()
+    assert scheduler.coalesce("key", lambda: 1) == 1
+    assert scheduler.coalesce("key", lambda: 2) == 2
+    assert scheduler.stats["coalesced"] == 0
+
+
+def test_failure_is_shared_and_unregistered():
+    scheduler = ProviderScheduler()
+    started = threading.Event()
+    release = threading.Event()
+
+    def call():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(scheduler.coalesce, "key", call)
+        assert started.wait(5)
+        follower = executor.submit(scheduler.coalesce, "key", call)
+        while scheduler.stats["coalesced"] < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result(5)
+    assert scheduler.inflight == {}
+
+
+def test_throttle_rejects_waits_past_the_deadline():
+    scheduler = ProviderScheduler(rate_limits={"newsapi": (1.0, 1)})
+    scheduler.throttle("newsapi", max_wait=0)  # Uses the only token
+    with pytest.raises(ProviderBusy):
+        scheduler.throttle("newsapi", max_wait=0.1)
+    assert scheduler.stats["upstream"] == 1
+    assert scheduler.stats["rejected"] == 1
+
+
+def test_throttle_ignores_unknown_providers():
+    scheduler = ProviderScheduler(rate_limits={"newsapi": (1.0, 1)})
+    scheduler.throttle("local")
+    assert scheduler.stats["upstream"] == 0
+
+
+def test_cancelled_wait_refunds_its_token():
+    scheduler = ProviderScheduler(rate_limits={"newsapi": (0.1, 1)})
+    scheduler.throttle("newsapi")  # The next token is 10 s away
+    bucket = scheduler.buckets["newsapi"]
+
+    token = CancelToken()
+    reset = cancellation.current_token.set(token)
+    try:
+        threading.Timer(0.05, token.cancel).start()
+        with pytest.raises(SearchCancelled):
+            scheduler.throttle("newsapi")
+    finally:
+        cancellation.current_token.reset(reset)
+
+    assert scheduler.stats["cancelled"] == 1
+    assert scheduler.waiting["newsapi"] == 0
+    assert bucket.tokens > -0.5  # The reserved token was given back
+
+
+def test_cancelled_search_is_not_queued():
+    scheduler = ProviderScheduler()
+    token = CancelToken()
+    token.cancel()
+    reset = cancellation.current_token.set(token)
+    try:
+        with pytest.raises(SearchCancelled):
+            scheduler.throttle("newsapi")
+    finally:
+        cancellation.current_token.reset(reset)
+    assert scheduler.buckets["newsapi"].tokens == scheduler.buckets["newsapi"].capacity
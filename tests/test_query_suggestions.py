@@ -0,0 +1,72 @@
+from query_suggestions import (ENTITY_WEIGHT, QUERY_WEIGHT, TITLE_WEIGHT, SuggestionIndex,
+                               extract_entities)
+
+
+class FakeStore:
+    """Article store serving fixed query history and articles"""
+
+    def __init__(self, queries, articles):
+        self.queries = queries
+        self.articles = articles
+
+    def recent_queries(self, limit):
+        return self.queries[:limit]
+
+    def recent_articles(self, limit):
+        return self.articles[:limit]
+
+
+def test_extract_entities_from_sentences():
+    text = "Lawmakers in Washington met with the Supreme Court and NASA officials."
+    assert extract_entities(text) == ["Washington", "Supreme Court", "NASA"]
+
+
+def test_extract_entities_skips_title_case_headlines_and_stopwords():
+    assert extract_entities("Senate Passes Climate Bill After Marathon Session") == []
+    assert extract_entities("Negotiators say the talks stalled as The White House blamed lawmakers") == ["White House"]
+    assert extract_entities("") == []
+
+
+def test_suggest_by_prefix_most_used_first():
+    index = SuggestionIndex()
+    index.add("climate bill", 1.0)
+    index.add("Climate   Crisis", 2.0)
+    index.add("clean energy", 5.0)
+    index.add("sports", 9.0)
+    assert index.suggest("cl") == ["clean energy", "Climate Crisis", "climate bill"]
+    assert index.suggest("CLIM") == ["Climate Crisis", "climate bill"]
+    assert index.suggest("c") == []  # Shorter than the minimum prefix
+
+
+def test_repeated_phrase_gains_weight():
+    index = SuggestionIndex()
+    index.add("climate bill", 1.0)
+    index.add("climate crisis", 2.0)
+    index.add("Climate Bill", 2.0)
+    assert len(index) == 2
+    assert index.suggest("climate") == ["climate bill", "climate crisis"]
+
+
+def test_typed_phrase_is_not_suggested_back():
+    index = SuggestionIndex()
+    index.add("climate", 1.0)
+    index.add("climate bill", 1.0)
+    assert index.suggest("climate") == ["climate bill"]
+
+
+def test_prune_keeps_the_most_used():
+    index = SuggestionIndex(max_entries=10)
+    for i in range(11):
+        index.add(f"phrase {i:02d}", float(i))
+    assert len(index) == 8
+    assert index.suggest("phrase", limit=20) == [f"phrase {i:02d}" for i in range(10, 2, -1)]
+
+
+def test_load_from_article_store(newsapi_articles):
+    index = SuggestionIndex()
+    index.load(FakeStore([("climate bill", 2)], newsapi_articles))
+    assert index.loaded
+    assert index.weights["climate bill"] == 2 * QUERY_WEIGHT
+    assert index.weights["senate passes climate bill after marathon session"] == TITLE_WEIGHT
+    assert index.suggest("clim")[0] == "climate bill"
+    assert any(weight == ENTITY_WEIGHT for weight in index.weights.values())
@@ -0,0 +1,62 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from conftest import load_fixture
+from relevance import RelevanceScorer, article_age_hours, query_terms, stars_from_scores
+
+JUDGMENTS = json.loads(load_fixture("relevance_judgments.json"))["queries"]
+
+
+def test_query_terms_drop_stopwords_and_repeats():
+    assert query_terms("The news on the Climate climate bill") == ["climate", "bill"]
+    assert query_terms("the and news") == []
+
+
+def test_term_frequencies_match_whole_words_and_plurals():
+    tf, lengths = RelevanceScorer().term_frequencies(["bill", "tax"], ["Bills, bill and billion", "Taxes and taxi"])
+    assert tf.tolist() == [[2, 0], [0, 1]]
+    assert lengths.tolist() == [23, 14]
+
+
+@pytest.mark.parametrize("case", JUDGMENTS, ids=lambda case: case["query"])
+def test_best_judged_story_ranks_first(case, newsapi_articles):
+    scores = RelevanceScorer().score(case["query"], newsapi_articles)
+    top = newsapi_articles[int(np.argmax(scores))]
+    assert case["judgments"].get(top["title"]) == 3
+
+    # Stories judged irrelevant score well below the best match
+    for article, score in zip(newsapi_articles, scores):
+        if article["title"] not in case["judgments"]:
+            assert score <= scores.max() / 2
+
+
+def test_no_terms_scores_zero(newsapi_articles):
+    assert not RelevanceScorer().score("the news", newsapi_articles).any()
+    assert len(RelevanceScorer().score("climate", [])) == 0
+
+
+def test_recency_breaks_ties_between_matches():
+    now = time.time()
+    articles = [{"title": "Climate bill passes", "published": now - 48 * 3600},
+                {"title": "Climate bill passes", "published": now},
+                {"title": "Sports roundup", "published": now}]
+    scores = RelevanceScorer().score("climate bill", articles, now=now)
+    assert scores[1] > scores[0] > 0
+    assert scores[2] == 0  # Fresh but unrelated articles get no bonus
+
+
+def test_article_age_from_display_time():
+    now = time.time()
+    assert article_age_hours({"time": "3 hours ago"}, now) == 3
+    assert article_age_hours({"time": "2d"}, now) == 48
+    assert article_age_hours({"time": "Just now"}, now) == 0
+    assert article_age_hours({"published": now - 7200}, now) == 2
+    assert article_age_hours({"time": "sometime"}, now) is None
+
+
+def test_stars_relative_to_best_match():
+    assert stars_from_scores(np.array([4.0, 2.0, 0.0])).tolist() == [5, 3, 1]
+    assert stars_from_scores(np.zeros(2)).tolist() == [3, 3]
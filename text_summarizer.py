@@ -1,83 +1,257 @@
-import nltk
-from nltk.tokenize import sent_tokenize
-from nltk.corpus import stopwords
-from nltk.cluster.util import cosine_distance
+import json
+import os
 import numpy as np
-from collections import Counter
+from collections import Counter, deque
 import string
 import logging
 import re
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
-nltk.download('punkt_tab', quiet=True)
+from concurrent.futures import BrokenExecutor
+from stage_metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# NLTK data needed by the summarizer. It is never downloaded implicitly;
+# run "python text_summarizer.py --download" once to install it.
+NLTK_DOWNLOADS = ['punkt', 'punkt_tab', 'stopwords']
+NLTK_REQUIRED = [['corpora/stopwords'], ['tokenizers/punkt_tab', 'tokenizers/punkt']]  # Any of each group
+
+# Records that the NLTK data was verified, so later starts skip the lookups
+NLTK_MARKER_FILE = os.path.join("cache", "nltk_resources.json")
+
+
+def download_nltk_resources():
+    """Download the NLTK data used by the summarizer (needs network access)"""
+    import nltk
+    for resource in NLTK_DOWNLOADS:
+        nltk.download(resource, quiet=True)
+    ensure_nltk_resources(refresh=True)
+
+
+def ensure_nltk_resources(refresh=False):
+    """Verify once that the NLTK data is installed locally, raising LookupError if not"""
+    if not refresh and os.path.exists(NLTK_MARKER_FILE):
+        try:
+            with open(NLTK_MARKER_FILE, 'r') as f:
+                if json.load(f).get("required") == NLTK_REQUIRED:
+                    return
+        except (OSError, ValueError):
+            pass
+    
+    import nltk
+    for group in NLTK_REQUIRED:
+        for resource in group:
+            try:
+                nltk.data.find(resource)
+                break
+            except LookupError:
+                continue
+        else:
+            raise LookupError(f"NLTK resource {group[0]} is not installed. "
+                              "Run 'python text_summarizer.py --download' to install it.")
+    
+    try:
+        os.makedirs(os.path.dirname(NLTK_MARKER_FILE), exist_ok=True)
+        with open(NLTK_MARKER_FILE, 'w') as f:
+            json.dump({"required": NLTK_REQUIRED}, f)
+    except OSError:
+        logger.error("Failed to write NLTK resource marker")
+
+
+def forget_nltk_resources():
+    """Drop the verification marker, e.g. after NLTK data went missing"""
+    try:
+        os.remove(NLTK_MARKER_FILE)
+    except OSError:
+        pass
+
+
+# Multi-document (map-reduce) summarization settings
+CLUSTER_ARTICLES = 3  # Articles of one story cluster summarized together
+ARTICLE_MAX_CHARS = 4000  # Characters of an article's text fed to the summarizer
+CLUSTER_SENTENCES = 2  # Sentences kept per story cluster by the map step
+CLUSTER_WORDS = 60  # Words kept per story cluster by the map step
+REDUCE_FANIN = 24  # Partial summaries merged by one reduce step
+REDUCE_SENTENCES = 4  # Sentences kept by an intermediate reduce step
+SUMMARY_IN_FLIGHT = 2 * (os.cpu_count() or 1)  # Tasks queued on the worker pool at a time
+PARALLEL_MIN_TASKS = 16  # Fewer summarization tasks than this run in-process
+SUMMARY_CHUNK_SIZE = 8  # Texts sent to a worker per task, to amortize the inter-process overhead
+
+# Summarizer of a worker pool process (created on first use)
+_worker_summarizer = None
+
+
+def summarize_texts(texts, num_sentences, max_words):
+    """Summarize texts with this process's own summarizer (the unit of work sent to the pool)"""
+    global _worker_summarizer
+    if _worker_summarizer is None:
+        _worker_summarizer = TextSummarizer()
+    return [_worker_summarizer.generate_summary(text, num_sentences, max_words) for text in texts]
+
+
+def warm_worker():
+    """Load NLTK in a worker process as it starts, if its data is installed"""
+    global _worker_summarizer
+    try:
+        _worker_summarizer = TextSummarizer()
+    except LookupError:
+        pass
+
+
+def article_text(article):
+    """Title, snippet and enhanced content of an article as one text of at most ARTICLE_MAX_CHARS"""
+    text = f"{article.get('title', '')}. {article.get('snippet') or ''}"
+    if article.get('enhanced_content'):
+        text += f" {article['enhanced_content']}"
+    return text[:ARTICLE_MAX_CHARS]
+
+
+def story_clusters(articles):
+    """Group articles telling the same story (at most CLUSTER_ARTICLES each), keeping their order"""
+    import near_duplicates
+    
+    feature_sets = [near_duplicates.features(article.get('title', ''), article.get('snippet', ''))
+                    for article in articles]
+    return [[articles[i] for i in group[:CLUSTER_ARTICLES]]
+            for group in near_duplicates.duplicate_groups(feature_sets)]
+
+
+def load_sentence_tokenizer():
+    """The English Punkt tokenizer, which unlike sent_tokenize also reports sentence offsets"""
+    try:
+        from nltk.tokenize import PunktTokenizer  # NLTK 3.8.2+ with the punkt_tab data
+        return PunktTokenizer("english")
+    except (ImportError, LookupError):
+        import nltk
+        return nltk.data.load("tokenizers/punkt/english.pickle")
+
+
+class Document:
+    """A text segmented and tokenized once, shared by every summarizer step
+    
+    sentences[i] is the original text of sentence i and spans[i] its
+    (start, end) character offsets in text. tokens[i] lists the integer IDs
+    of its words without stopwords (lowercase, punctuation stripped) and
+    word_counts[i] its number of words including stopwords. words maps an
+    ID back to its word.
+    """
+    
+    def __init__(self, text, spans, tokens, word_counts, words):
+        self.text = text
+        self.spans = spans
+        self.sentences = [text[start:end] for start, end in spans]
+        self.tokens = tokens
+        self.word_counts = word_counts
+        self.words = words
+    
+    def __len__(self):
+        return len(self.spans)
+
+
 class TextSummarizer:
     """Simple extractive text summarization"""
     
     def __init__(self):
-        # Add error handling for stopwords initialization
+        ensure_nltk_resources()
+        
+        # NLTK is heavy, so it is only imported once a summarizer is needed
+        from nltk.corpus import stopwords
+        
         try:
+            self.sentence_tokenizer = load_sentence_tokenizer()
             self.stop_words = set(stopwords.words('english'))
         except LookupError:
-            nltk.download('stopwords', quiet=True)
-            self.stop_words = set(stopwords.words('english'))
-        self.punctuation = set(string.punctuation)
+            forget_nltk_resources()
+            raise
+        self.punctuation_table = str.maketrans('', '', string.punctuation)
     
-    def preprocess_text(self, text):
-        """Clean and tokenize text"""
-        # Convert to lowercase and remove punctuation
-        text = text.lower()
-        text = ''.join([c for c in text if c not in self.punctuation])
-        
-        # Tokenize into sentences with error handling
-        try:
-            sentences = sent_tokenize(text)
-        except LookupError:
-            nltk.download('punkt', quiet=True)
-            sentences = sent_tokenize(text)
+    def document(self, text):
+        """Segment and tokenize text into a Document (a Document is returned as is)"""
+        if isinstance(text, Document):
+            return text
         
-        return sentences
+        spans = list(self.sentence_tokenizer.span_tokenize(text)) if text else []
+        ids = {}
+        words = []
+        tokens = []
+        word_counts = []
+        for start, end in spans:
+            sentence_words = text[start:end].lower().translate(self.punctuation_table).split()
+            word_counts.append(len(sentence_words))
+            sentence_tokens = []
+            for word in sentence_words:
+                if word not in self.stop_words:
+                    token = ids.get(word)
+                    if token is None:
+                        token = ids[word] = len(words)
+                        words.append(word)
+                    sentence_tokens.append(token)
+            tokens.append(sentence_tokens)
+        return Document(text, spans, tokens, word_counts, words)
     
-    def sentence_similarity(self, sent1, sent2):
-        """Calculate similarity between two sentences"""
-        # Convert sentences to word lists and remove stop words
-        words1 = [w for w in sent1.split() if w not in self.stop_words]
-        words2 = [w for w in sent2.split() if w not in self.stop_words]
-        
-        # Create word frequency vectors
-        all_words = list(set(words1 + words2))
-        vector1 = [0] * len(all_words)
-        vector2 = [0] * len(all_words)
-        
-        # Fill vectors
-        for w in words1:
-            if w in all_words:
-                vector1[all_words.index(w)] += 1
-                
-        for w in words2:
-            if w in all_words:
-                vector2[all_words.index(w)] += 1
+    def sentence_similarity(self, tokens1, tokens2):
+        """Cosine similarity of two sentences given as token ID lists"""
+        vector1 = Counter(tokens1)
+        vector2 = Counter(tokens2)
         
         # Handle empty vectors
-        if sum(vector1) == 0 or sum(vector2) == 0:
+        if not vector1 or not vector2:
             return 0.0
         
-        # Calculate cosine similarity
-        return 1 - cosine_distance(vector1, vector2)
+        dot = sum(count * vector2[w] for w, count in vector1.items())
+        norm1 = np.sqrt(sum(count * count for count in vector1.values()))
+        norm2 = np.sqrt(sum(count * count for count in vector2.values()))
+        return dot / (norm1 * norm2)
     
-    def build_similarity_matrix(self, sentences):
-        """Build similarity matrix for all sentences"""
-        # Create empty similarity matrix
-        similarity_matrix = np.zeros((len(sentences), len(sentences)))
-        
-        # Fill similarity matrix
-        for i in range(len(sentences)):
-            for j in range(len(sentences)):
-                if i != j:
-                    similarity_matrix[i][j] = self.sentence_similarity(
-                        sentences[i], sentences[j])
+    def build_term_matrix(self, document):
+        """Build a sparse term-frequency matrix for the document's sentences
+        
+        Returns (rows, cols, counts, vocabulary_size) where each triplet gives
+        the count of one non-stopword term in one sentence.
+        """
+        vocabulary_size = len(document.words)
+        lengths = [len(tokens) for tokens in document.tokens]
+        if not sum(lengths):
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty, np.zeros(0), vocabulary_size
+        
+        rows = np.repeat(np.arange(len(document), dtype=np.intp), lengths)
+        cols = np.fromiter((token for tokens in document.tokens for token in tokens), dtype=np.intp,
+                           count=len(rows))
+        
+        # Collapse repeated (sentence, term) pairs into counts
+        keys = rows * vocabulary_size + cols
+        keys, counts = np.unique(keys, return_counts=True)
+        return keys // vocabulary_size, keys % vocabulary_size, counts.astype(float), vocabulary_size
+    
+    def build_similarity_matrix(self, document):
+        """Build similarity matrix for all sentences
+        
+        All pairwise cosine scores come from one product of the row-normalized
+        term-frequency matrix with its transpose.
+        """
+        n = len(document)
+        similarity_matrix = np.zeros((n, n))
+        
+        rows, cols, counts, vocabulary_size = self.build_term_matrix(document)
+        if not len(rows):
+            return similarity_matrix
+        
+        # Sentence vector norms come from every term the sentence contains
+        norms = np.sqrt(np.bincount(rows, weights=counts * counts, minlength=n))
+        
+        # Terms seen in a single sentence never contribute to a pairwise score,
+        # so only shared terms need to be materialized for the product
+        shared = np.bincount(cols, minlength=vocabulary_size) > 1
+        if not shared.any():
+            return similarity_matrix
+        keep = shared[cols]
+        column_ids = np.cumsum(shared) - 1
+        
+        normalized = np.zeros((n, int(shared.sum())))
+        normalized[rows[keep], column_ids[cols[keep]]] = counts[keep] / norms[rows[keep]]
+        
+        similarity_matrix = normalized @ normalized.T
+        np.fill_diagonal(similarity_matrix, 0.0)
         
         return similarity_matrix
     
@@ -85,33 +259,33 @@ class TextSummarizer:
         """Generate summary by extracting most important sentences with length control
         
         Args:
-            text: The text to summarize
+            text: The text to summarize, or its Document
             num_sentences: Maximum number of sentences to include
             max_words: Maximum number of words in the summary
         """
-        if not text or len(text) < 100:  # Don't summarize very short texts
-            return text
-            
-        # Preprocess text
-        sentences = self.preprocess_text(text)
+        raw_text = text.text if isinstance(text, Document) else text
+        if not raw_text or len(raw_text) < 100:  # Don't summarize very short texts
+            return raw_text
+        
+        document = self.document(text)
         
         # If there are fewer sentences than requested, return the original text
-        if len(sentences) <= num_sentences:
-            return text
+        if len(document) <= num_sentences:
+            return document.text
             
         # Build similarity matrix
-        similarity_matrix = self.build_similarity_matrix(sentences)
+        similarity_matrix = self.build_similarity_matrix(document)
         
         # Calculate sentence scores using PageRank-like algorithm
-        sentence_scores = np.array([sum(row) for row in similarity_matrix])
+        sentence_scores = similarity_matrix.sum(axis=1)
         
         # Enhance scoring with position and length factors
         for i, score in enumerate(sentence_scores):
             # Boost importance of early sentences (introduction)
-            position_factor = 1.0 if i < len(sentences) // 4 else 0.8
+            position_factor = 1.0 if i < len(document) // 4 else 0.8
             
             # Penalize very short or very long sentences
-            words_count = len(sentences[i].split())
+            words_count = document.word_counts[i]
             if words_count < 5:
                 length_factor = 0.7  # Penalize very short sentences
             elif words_count > 30:
@@ -125,65 +299,48 @@ class TextSummarizer:
         # Get indices of top sentences
         ranked_indices = np.argsort(sentence_scores)[::-1]
         
-        # Extract original sentences
-        try:
-            original_sentences = sent_tokenize(text)
-        except LookupError:
-            nltk.download('punkt', quiet=True)
-            original_sentences = sent_tokenize(text)
-        
         # Build summary with word count constraint
-        summary_sentences = []
+        summary_indices = []
         word_count = 0
         
         for idx in ranked_indices:
-            if len(summary_sentences) >= num_sentences:
+            if len(summary_indices) >= num_sentences:
                 break
                 
             # Skip sentences that are too similar to already selected ones
-            if self._is_redundant(original_sentences[idx], summary_sentences):
+            if self._is_redundant(document, idx, summary_indices):
                 continue
                 
-            sentence = original_sentences[idx]
-            sentence_word_count = len(sentence.split())
+            sentence_word_count = document.word_counts[idx]
             
             # Check if adding this sentence would exceed the word limit
             if word_count + sentence_word_count > max_words:
                 # If we haven't added any sentences yet, add this one anyway
-                if not summary_sentences:
-                    summary_sentences.append(sentence)
+                if not summary_indices:
+                    summary_indices.append(idx)
                 break
                 
-            summary_sentences.append(sentence)
+            summary_indices.append(idx)
             word_count += sentence_word_count
         
-        # Sort sentences by their original order for better readability
-        summary_indices = [original_sentences.index(sent) for sent in summary_sentences]
-        summary_sentences = [s for _, s in sorted(zip(summary_indices, summary_sentences))]
-        
-        # Compress sentences to make them cleaner
-        compressed_sentences = [self._compress_sentence(s) for s in summary_sentences]
-        
-        return ' '.join(compressed_sentences)
+        # Keep the sentences in their original order for better readability, compressing each
+        return ' '.join(self._compress_sentence(document, idx) for idx in sorted(summary_indices))
     
-    def _is_redundant(self, new_sentence, selected_sentences, similarity_threshold=0.5):
+    def _is_redundant(self, document, index, selected_indices, similarity_threshold=0.5):
         """Check if a sentence is too similar to any already selected sentences"""
-        if not selected_sentences:
-            return False
-            
-        for selected in selected_sentences:
-            similarity = self.sentence_similarity(new_sentence, selected)
+        for selected in selected_indices:
+            similarity = self.sentence_similarity(document.tokens[index], document.tokens[selected])
             if similarity > similarity_threshold:
                 return True
                 
         return False
         
-    def _compress_sentence(self, sentence):
+    def _compress_sentence(self, document, index):
         """Compress a sentence by removing less important parts"""
-        words = sentence.split()
+        sentence = document.sentences[index]
         
         # Don't compress very short sentences
-        if len(words) < 10:
+        if document.word_counts[index] < 10:
             return sentence
             
         # Remove certain phrases and words that are often redundant
@@ -205,40 +362,79 @@ class TextSummarizer:
         return sentence
     
     def extract_keywords(self, text, num_keywords=5):
-        """Extract key terms from text"""
-        # Clean text and tokenize
-        text = text.lower()
-        text = ''.join([c for c in text if c not in self.punctuation])
-        words = text.split()
-        
-        # Remove stop words
-        words = [word for word in words if word not in self.stop_words and len(word) > 2]
+        """Extract key terms from text or its Document"""
+        document = self.document(text)
         
-        # Count word frequencies
-        word_freq = Counter(words)
+        # Count the non-stopword tokens, keeping words longer than two characters
+        token_freq = Counter(token for tokens in document.tokens for token in tokens
+                             if len(document.words[token]) > 2)
         
         # Get most common words
-        keywords = [word for word, _ in word_freq.most_common(num_keywords)]
+        return [document.words[token] for token, _ in token_freq.most_common(num_keywords)]
+    
+    def map_summaries(self, texts, num_sentences, max_words, executor=None):
+        """Summarize texts independently, in the worker pool when there are enough of them
+        
+        Only a couple of tasks per worker are in flight at a time, so memory
+        stays bounded however many texts there are. Summaries come back in
+        the order of texts. executor may be any executor or WorkerPool and
+        defaults to the shared worker pool.
+        """
+        if executor is None and len(texts) < PARALLEL_MIN_TASKS:
+            return [self.generate_summary(text, num_sentences, max_words) for text in texts]
+        
+        from worker_pool import shared_pool
         
-        return keywords
+        pool = executor or shared_pool()
+        summaries = []
+        in_flight = deque()
+        try:
+            for start in range(0, len(texts), SUMMARY_CHUNK_SIZE):
+                if len(in_flight) >= SUMMARY_IN_FLIGHT:
+                    summaries.extend(in_flight.popleft().result())
+                in_flight.append(pool.submit(summarize_texts, texts[start:start + SUMMARY_CHUNK_SIZE],
+                                             num_sentences, max_words))
+            for future in in_flight:
+                summaries.extend(future.result())
+        except BrokenExecutor as e:
+            if executor is not None:
+                raise
+            # A worker died (the pool restarts itself); finish this batch here
+            logger.error(f"Worker pool failed, summarizing in-process: {e}")
+            return [self.generate_summary(text, num_sentences, max_words) for text in texts]
+        return summaries
     
-    def summarize_articles(self, articles, query, max_length=500):
-        """Create a comprehensive summary from multiple articles"""
+    @metrics.timed("summary")
+    def summarize_articles(self, articles, query, max_length=500, executor=None):
+        """Create a comprehensive summary from multiple articles
+        
+        Map-reduce over the whole result set: each story cluster (title,
+        snippet and enhanced content of up to CLUSTER_ARTICLES articles) is
+        summarized on its own, in parallel when there are many. The partial
+        summaries are then merged REDUCE_FANIN at a time until one summary
+        is left, and every merge drops sentences repeating ones it already
+        chose. executor optionally replaces the shared worker pool.
+        """
         try:
-            # Combine all article content
-            all_text = ""
-            for article in articles[:5]:  # Use top 5 articles for summary
-                title = article.get('title', '')
-                snippet = article.get('snippet', '')
-                all_text += f"{title}. {snippet} "
+            texts = [" ".join(article_text(article) for article in cluster)
+                     for cluster in story_clusters(articles)]
             
             # Generate summary
-            if len(all_text) > 100:
-                # Use improved summary with word limit
-                summary = self.generate_summary(all_text, num_sentences=5, max_words=80)
+            if sum(len(text) for text in texts) > 100:
+                # Map: one short summary per story
+                partials = self.map_summaries(texts, CLUSTER_SENTENCES, CLUSTER_WORDS, executor)
                 
                 # Extract keywords
-                keywords = self.extract_keywords(all_text)
+                keywords = self.extract_keywords(" ".join(partials))
+                
+                # Reduce: merge groups of partial summaries until one merge can take them all
+                while len(partials) > REDUCE_FANIN:
+                    groups = [" ".join(partials[i:i + REDUCE_FANIN]) for i in range(0, len(partials), REDUCE_FANIN)]
+                    partials = self.map_summaries(groups, REDUCE_SENTENCES,
+                                                  REDUCE_SENTENCES * CLUSTER_WORDS // CLUSTER_SENTENCES, executor)
+                
+                # Use improved summary with word limit
+                summary = self.generate_summary(" ".join(partials), num_sentences=5, max_words=80)
                 
                 # Format the summary concisely
                 formatted_summary = f"Key developments on '{query}':\n\n"
@@ -273,4 +469,22 @@ class TextSummarizer:
             
             return summary
         except Exception:
-            return f"Found multiple news articles about '{query}'. Please check the details below."
\ No newline at end of file
+            return f"Found multiple news articles about '{query}'. Please check the details below."
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Manage the NLTK data used by the summarizer")
+    parser.add_argument("--download", action="store_true", help="Download the required NLTK data")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
+    if args.download:
+        download_nltk_resources()
+    try:
+        ensure_nltk_resources(refresh=True)
+        print("NLTK resources are installed.")
+    except LookupError as e:
+        print(e)
@@ -0,0 +1,137 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Future
+
+logger = logging.getLogger(__name__)
+
+# Default pool settings
+WORKER_PROCESSES = os.cpu_count() or 1
+WARM_MODULES = ("bs4", "news_engine", "text_summarizer")  # Imported by every worker as it starts
+PARSER_WARM_MODULES = ("bs4", "news_engine")  # Enough for results-page parsing, without numpy or NLTK
+
+
+def warm_up(modules):
+    """Worker initializer: import the task modules once so the first task doesn't pay for them"""
+    for name in modules:
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            logger.debug(f"Worker could not preload {name}: {e}")
+            continue
+        warm = getattr(module, "warm_worker", None)
+        if warm:
+            warm()
+
+
+def timed_call(fn, *args):
+    """Run a task in a worker and return (result, seconds spent running it)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class WorkerPool:
+    """Worker processes for CPU-bound stages, so they neither hold the GUI process's GIL nor share one core
+
+    Tasks are module-level functions that take raw bytes or text and
+    return compact records. Workers are spawned once (on first use, or
+    ahead of time with start()) and import WARM_MODULES as they start.
+    Every task's time in the queue and in the worker is recorded per task
+    function. A pool whose worker died is replaced on the next submit.
+    """
+
+    def __init__(self, processes=WORKER_PROCESSES, warm_modules=WARM_MODULES):
+        self.processes = processes
+        self.warm_modules = warm_modules
+        self.lock = threading.Lock()
+        self._executor = None
+        self.stats = {}  # task name -> {"tasks", "busy", "queued", "max"}
+
+    def executor(self):
+        with self.lock:
+            if self._executor is None:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # Spawned workers don't inherit the parent's threads, sockets or Tk state
+                self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=warm_up, initargs=(self.warm_modules,))
+            return self._executor
+
+    def start(self):
+        """Spawn and warm every worker now, in the background, instead of on the first task"""
+        executor = self.executor()
+        for _ in range(self.processes):
+            executor.submit(time.sleep, 0)
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in a worker, returning a Future for its result"""
+        submitted = time.perf_counter()
+        try:
+            inner = self.executor().submit(timed_call, fn, *args)
+        except BrokenExecutor:
+            self.reset()
+            raise
+
+        outer = Future()
+
+        def finished(future):
+            try:
+                result, busy = future.result()
+            except BrokenExecutor as e:
+                self.reset()
+                outer.set_exception(e)
+                return
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            self.record(fn.__name__, busy, time.perf_counter() - submitted - busy)
+            outer.set_result(result)
+
+        inner.add_done_callback(finished)
+        return outer
+
+    def run(self, fn, *args):
+        """Run fn(*args) in a worker and wait for its result"""
+        return self.submit(fn, *args).result()
+
+    def record(self, name, busy, queued):
+        with self.lock:
+            stats = self.stats.setdefault(name, {"tasks": 0, "busy": 0.0, "queued": 0.0, "max": 0.0})
+            stats["tasks"] += 1
+            stats["busy"] += busy
+            stats["queued"] += max(0.0, queued)
+            stats["max"] = max(stats["max"], busy)
+
+    def stats_text(self):
+        """Per-task count and average run/queue time for logs and the status bar"""
+        with self.lock:
+            parts = [f"{name} {stats['tasks']}× {stats['busy'] / stats['tasks'] * 1000:.0f} ms "
+                     f"(+{stats['queued'] / stats['tasks'] * 1000:.0f} ms queued)"
+                     for name, stats in self.stats.items()]
+        return f"Workers: {', '.join(parts)}" if parts else ""
+
+    def reset(self):
+        """Drop the executor (e.g. after a worker died) so the next task starts a fresh one"""
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            logger.error("Worker pool broken, restarting it")
+            # A broken pool has already failed every pending future
+            executor.shutdown(wait=False)
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """The process-wide worker pool (its processes are only spawned once it is used)"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = WorkerPool()
+        return _shared_pool